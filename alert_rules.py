@@ -0,0 +1,282 @@
+import itertools
+import os
+import sqlite3
+from bisect import bisect_left, bisect_right
+
+ALERT_RULES_DB_PATH = os.getenv("ALERT_RULES_DB_PATH", "alert_rules.db")
+DEFAULT_WINDOW = 900
+MAX_RULES_PER_CHAT = 20
+# Rule inserts and deletes kept for other instances to catch up from; one that falls further behind reloads
+CHANGE_LOG_SIZE = 100000
+
+# "above"/"below" compare the price; "rise"/"drop" compare the % change over a window
+RULE_KINDS = ("above", "below", "rise", "drop")
+
+
+class AlertRule:
+    __slots__ = ("rule_id", "chat_id", "kind", "threshold", "window")
+
+    def __init__(self, rule_id: int, chat_id: int, kind: str, threshold: float, window: int = DEFAULT_WINDOW):
+        self.rule_id = rule_id
+        self.chat_id = chat_id
+        self.kind = kind
+        self.threshold = threshold
+        self.window = window
+
+    def describe(self) -> str:
+        if self.kind in ("above", "below"):
+            return f"#{self.rule_id} price {self.kind} {self.threshold:g} DeSo"
+        return f"#{self.rule_id} {self.kind} of {self.threshold:g}% within {self.window // 60}m"
+
+    def message(self, value: float) -> str:
+        if self.kind == "above":
+            return f"🔔 $TOKEN is above {self.threshold:g} DeSo: now {value}."
+        if self.kind == "below":
+            return f"🔔 $TOKEN is below {self.threshold:g} DeSo: now {value}."
+        verb = "rose" if self.kind == "rise" else "dropped"
+        return f"🔔 $TOKEN {verb} {abs(value):.2f}% within {self.window // 60}m (your alert: {self.threshold:g}%)."
+
+
+class SortedRuleIndex:
+    # Parallel lists kept sorted by threshold so a tick only touches the rules it crosses
+    def __init__(self):
+        self.keys = []
+        self.rules = []
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def add(self, rule: AlertRule) -> None:
+        index = bisect_right(self.keys, rule.threshold)
+        self.keys.insert(index, rule.threshold)
+        self.rules.insert(index, rule)
+
+    def extend(self, rules) -> None:
+        # One sort instead of an insert per rule; equal thresholds keep their order, as with add
+        self.rules = sorted(itertools.chain(self.rules, rules), key=lambda rule: rule.threshold)
+        self.keys = [rule.threshold for rule in self.rules]
+
+    def remove(self, rule: AlertRule) -> bool:
+        index = bisect_left(self.keys, rule.threshold)
+        while index < len(self.keys) and self.keys[index] == rule.threshold:
+            if self.rules[index].rule_id == rule.rule_id:
+                del self.keys[index]
+                del self.rules[index]
+                return True
+            index += 1
+        return False
+
+    def pop_at_most(self, value: float):
+        # Rules with threshold <= value
+        index = bisect_right(self.keys, value)
+        fired = self.rules[:index]
+        del self.keys[:index]
+        del self.rules[:index]
+        return fired
+
+    def pop_at_least(self, value: float):
+        # Rules with threshold >= value
+        index = bisect_left(self.keys, value)
+        fired = self.rules[index:]
+        del self.keys[index:]
+        del self.rules[index:]
+        return fired
+
+
+class RuleEngine:
+    def __init__(self):
+        self.above = SortedRuleIndex()
+        self.below = SortedRuleIndex()
+        # window seconds -> index of rise/drop thresholds in %
+        self.rise = {}
+        self.drop = {}
+        self.by_id = {}
+        self.by_chat = {}
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def _index_for(self, rule: AlertRule, create: bool = True):
+        if rule.kind == "above":
+            return self.above
+        if rule.kind == "below":
+            return self.below
+        indexes = self.rise if rule.kind == "rise" else self.drop
+        if create and rule.window not in indexes:
+            indexes[rule.window] = SortedRuleIndex()
+        return indexes.get(rule.window)
+
+    def add(self, chat_id: int, kind: str, threshold: float, window: int = DEFAULT_WINDOW, rule_id: int = None) -> AlertRule:
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown alert kind: {kind}")
+        if rule_id is None:
+            rule_id = next(self._ids)
+        else:
+            # Keep generated ids ahead of ids loaded from storage
+            self._ids = itertools.count(max(rule_id + 1, next(self._ids)))
+        rule = AlertRule(rule_id, chat_id, kind, threshold, window)
+        self._index_for(rule).add(rule)
+        self.by_id[rule_id] = rule
+        self.by_chat.setdefault(chat_id, {})[rule_id] = rule
+        return rule
+
+    def load(self, rows) -> None:
+        # Bulk add of stored (rule_id, chat_id, kind, threshold, window) rows, each index sorted once
+        grouped = {}
+        max_id = 0
+        for rule_id, chat_id, kind, threshold, window in rows:
+            rule = AlertRule(rule_id, chat_id, kind, threshold, window)
+            grouped.setdefault((kind, window if kind in ("rise", "drop") else None), []).append(rule)
+            self.by_id[rule_id] = rule
+            self.by_chat.setdefault(chat_id, {})[rule_id] = rule
+            max_id = max(max_id, rule_id)
+        for rules in grouped.values():
+            self._index_for(rules[0]).extend(rules)
+        self._ids = itertools.count(max(max_id + 1, next(self._ids)))
+
+    def remove(self, rule_id: int):
+        rule = self.by_id.pop(rule_id, None)
+        if rule is not None:
+            self._index_for(rule, create=False).remove(rule)
+            self._forget(rule)
+        return rule
+
+    def _forget(self, rule: AlertRule) -> None:
+        chat_rules = self.by_chat.get(rule.chat_id)
+        if chat_rules is not None:
+            chat_rules.pop(rule.rule_id, None)
+            if not chat_rules:
+                del self.by_chat[rule.chat_id]
+
+    def rules_for(self, chat_id: int):
+        return list(self.by_chat.get(chat_id, {}).values())
+
+    def windows(self):
+        # Windows that currently have % rules, so callers only compute changes that matter
+        return {window for window, index in itertools.chain(self.rise.items(), self.drop.items()) if len(index)}
+
+    def _fired(self, rules, value):
+        for rule in rules:
+            del self.by_id[rule.rule_id]
+            self._forget(rule)
+        return [(rule, value) for rule in rules]
+
+    def on_price(self, price: float):
+        # Rules are one-shot: everything crossed by this price fires and is removed
+        fired = self._fired(self.above.pop_at_most(price), price)
+        fired += self._fired(self.below.pop_at_least(price), price)
+        return fired
+
+    def on_change(self, window: int, change: float):
+        fired = []
+        if change > 0 and window in self.rise:
+            fired += self._fired(self.rise[window].pop_at_most(change), change)
+        if change < 0 and window in self.drop:
+            fired += self._fired(self.drop[window].pop_at_most(-change), change)
+        return fired
+
+
+class RuleStore:
+    # Durable copy of the rules; the engine is loaded from it on startup and then follows the change log
+    def __init__(self, path: str = ALERT_RULES_DB_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alert_rules ("
+            "rule_id INTEGER PRIMARY KEY, chat_id INTEGER NOT NULL, kind TEXT NOT NULL, "
+            "threshold REAL NOT NULL, window_seconds INTEGER NOT NULL)"
+        )
+        # Every insert and delete in order, so other instances apply only what changed
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS alert_rule_changes ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, rule_id INTEGER NOT NULL, deleted INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+        self._data_version = None
+        self._change_seq = 0
+
+    def changed(self) -> bool:
+        # True once after another process sharing the database has committed rule changes
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = self._data_version is not None and version != self._data_version
+        self._data_version = version
+        return changed
+
+    def load(self, engine: RuleEngine) -> RuleEngine:
+        # The rules and the change log position are read from one snapshot
+        self.conn.execute("BEGIN")
+        try:
+            self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            self._change_seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM alert_rule_changes").fetchone()[0]
+            engine.load(self.conn.execute("SELECT * FROM alert_rules"))
+        finally:
+            self.conn.commit()
+        return engine
+
+    def sync(self, engine: RuleEngine) -> bool:
+        # Applies rule changes logged since the last load or sync; False when the log no longer
+        # reaches back that far and the engine has to be reloaded
+        self.conn.execute("BEGIN")
+        try:
+            changes = self.conn.execute(
+                "SELECT seq, rule_id, deleted FROM alert_rule_changes WHERE seq > ? ORDER BY seq", (self._change_seq,)
+            ).fetchall()
+            oldest = self.conn.execute("SELECT MIN(seq) FROM alert_rule_changes").fetchone()[0]
+            if changes and oldest > self._change_seq + 1:
+                return False
+            latest = {rule_id: deleted for _, rule_id, deleted in changes}
+            added = [rule_id for rule_id, deleted in latest.items() if not deleted and rule_id not in engine.by_id]
+            rows = self.conn.execute(
+                f"SELECT * FROM alert_rules WHERE rule_id IN ({', '.join('?' * len(added))})", added
+            ).fetchall() if added else []
+        finally:
+            self.conn.commit()
+        for rule_id, deleted in latest.items():
+            if deleted:
+                engine.remove(rule_id)
+        for rule_id, chat_id, kind, threshold, window in rows:
+            engine.add(chat_id, kind, threshold, window, rule_id=rule_id)
+        if changes:
+            self._change_seq = changes[-1][0]
+        return True
+
+    def insert(self, chat_id: int, kind: str, threshold: float, window: int = DEFAULT_WINDOW) -> int:
+        # The database assigns the id, so processes sharing it never hand out the same one
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO alert_rules VALUES (NULL, ?, ?, ?, ?)", (chat_id, kind, threshold, window)
+            )
+            self.conn.execute("INSERT INTO alert_rule_changes (rule_id, deleted) VALUES (?, 0)", (cursor.lastrowid,))
+        return cursor.lastrowid
+
+    def delete(self, rule_ids) -> None:
+        rule_ids = [(rule_id,) for rule_id in rule_ids]
+        with self.conn:
+            self.conn.executemany("DELETE FROM alert_rules WHERE rule_id = ?", rule_ids)
+            self.conn.executemany("INSERT INTO alert_rule_changes (rule_id, deleted) VALUES (?, 1)", rule_ids)
+            self.conn.execute(
+                "DELETE FROM alert_rule_changes WHERE seq <= (SELECT MAX(seq) FROM alert_rule_changes) - ?",
+                (CHANGE_LOG_SIZE,),
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def parse_rule(args, parse_window):
+    # "/alert above 12", "/alert drop 5% 1h" -> (kind, threshold, window)
+    if len(args) < 2 or args[0].lower() not in RULE_KINDS:
+        raise ValueError("Usage: /alert above|below <price> or /alert rise|drop <percent>% [15m|1h|4h|24h]")
+    kind = args[0].lower()
+    try:
+        threshold = float(args[1].rstrip('%'))
+    except ValueError:
+        raise ValueError("The threshold must be a number, e.g. 12 or 5%.")
+    window = DEFAULT_WINDOW
+    if kind in ("rise", "drop") and len(args) > 2:
+        window = parse_window(args[2])
+        if window is None:
+            raise ValueError("Unknown window; use 15m, 1h, 4h, 12h, 24h or 7d.")
+    if threshold <= 0:
+        raise ValueError("The threshold must be positive.")
+    return kind, threshold, window
@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from alert_rules import RuleEngine  # noqa: E402
+
+WINDOWS = (900, 3600, 86400)
+
+
+def build(engine, count, price, rng):
+    for i in range(count):
+        kind = rng.choice(("above", "below", "rise", "drop"))
+        if kind == "above":
+            threshold = price * rng.uniform(1.0, 1.5)
+        elif kind == "below":
+            threshold = price * rng.uniform(0.5, 1.0)
+        else:
+            threshold = rng.uniform(1, 30)
+        engine.add(i % 50000, kind, threshold, rng.choice(WINDOWS))
+
+
+def naive_scan(rules, price, changes):
+    # What evaluating every rule on every tick would cost
+    fired = 0
+    for rule in rules:
+        if rule.kind == "above" and price >= rule.threshold:
+            fired += 1
+        elif rule.kind == "below" and price <= rule.threshold:
+            fired += 1
+        elif rule.kind == "rise" and changes[rule.window] >= rule.threshold:
+            fired += 1
+        elif rule.kind == "drop" and -changes[rule.window] >= rule.threshold:
+            fired += 1
+    return fired
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexed alert-rule evaluation per price tick")
+    parser.add_argument("--rules", type=int, default=200000)
+    parser.add_argument("--ticks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    price = 12.0
+    engine = RuleEngine()
+    start = time.perf_counter()
+    build(engine, args.rules, price, rng)
+    print(f"built {len(engine)} rules in {time.perf_counter() - start:.2f}s")
+
+    snapshot = list(engine.by_id.values())
+    changes = {window: 0.0 for window in WINDOWS}
+    start = time.perf_counter()
+    naive_scan(snapshot, price, changes)
+    print(f"naive scan        {(time.perf_counter() - start) * 1000:8.2f}ms per tick")
+
+    fired = 0
+    worst = 0.0
+    elapsed = 0.0
+    for _ in range(args.ticks):
+        price *= 1 + rng.gauss(0, 0.004)
+        for window in WINDOWS:
+            changes[window] = rng.gauss(0, 0.5)
+        tick_start = time.perf_counter()
+        fired_now = engine.on_price(price)
+        for window in engine.windows():
+            fired_now += engine.on_change(window, changes[window])
+        tick_elapsed = time.perf_counter() - tick_start
+        elapsed += tick_elapsed
+        worst = max(worst, tick_elapsed)
+        fired += len(fired_now)
+        # Subscribers set fresh alerts so the rule population stays roughly constant (not timed)
+        build(engine, len(fired_now), price, rng)
+    print(f"indexed engine    {elapsed / args.ticks * 1000:8.3f}ms per tick, "
+          f"worst {worst * 1000:.2f}ms, {fired} rules fired over {args.ticks} ticks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from telegram.error import Forbidden, RetryAfter  # noqa: E402
+from broadcast import Broadcaster  # noqa: E402
+
+
+class FakeBot:
+    # Simulates Bot API latency, blocked users and occasional flood control
+    def __init__(self, latency, blocked_ratio, flood_ratio):
+        self.latency = latency
+        self.blocked_ratio = blocked_ratio
+        self.flood_ratio = flood_ratio
+        self.calls = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if chat_id % 1000 < self.blocked_ratio * 1000:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if random.random() < self.flood_ratio:
+            raise RetryAfter(1)
+
+
+async def sequential(bot, chat_ids, text):
+    # The original loop: one awaited send at a time
+    start = time.perf_counter()
+    for chat_id in chat_ids:
+        try:
+            await bot.send_message(chat_id=chat_id, text=text)
+        except Exception:
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broadcast fan-out against a fake Bot")
+    parser.add_argument("--subscribers", type=int, default=50000)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated send latency in seconds")
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="global messages/second (30 for regular bots, up to 1000 with paid broadcasts)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--sample", type=int, default=1000, help="subscribers timed for the sequential baseline")
+    args = parser.parse_args()
+
+    chat_ids = list(range(1, args.subscribers + 1))
+    text = "🚀 $TOKEN surged by 12.34% in the last 15 minutes! New LTP: 12.3 DeSo."
+
+    bot = FakeBot(args.latency, blocked_ratio=0.01, flood_ratio=0.0)
+    sample = asyncio.run(sequential(bot, chat_ids[:args.sample], text))
+    print(f"sequential  ~{sample * args.subscribers / args.sample:8.1f}s (extrapolated from {args.sample})")
+
+    bot = FakeBot(args.latency, blocked_ratio=0.01, flood_ratio=0.0005)
+    broadcaster = Broadcaster(rate=args.rate, concurrency=args.concurrency)
+    result = asyncio.run(broadcaster.broadcast(bot, chat_ids, text))
+    print(f"broadcaster  {result.elapsed:8.1f}s  {result}  api_calls={bot.calls}")
+    print(f"rate floor   {args.subscribers / args.rate:8.1f}s at {args.rate:g} msg/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import make_trade  # noqa: E402
+
+os.environ.setdefault("SEED_HEX", "11" * 32)
+
+import bot  # noqa: E402
+
+# The bot's databases are opened in a scratch directory, out of the working tree
+os.chdir(tempfile.mkdtemp())
+bot.open_stores()
+
+
+class MockTelegram:
+    # Counts Bot API calls and charges a fixed round-trip per call
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def update(self):
+        async def reply_text(text, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(self.latency)
+        return SimpleNamespace(message=SimpleNamespace(chat_id=1, reply_text=reply_text))
+
+
+async def legacy_bulktrade(update, context):
+    # The original handler: a header plus one reply per trade
+    trades = bot.trade_store.recent(bot.datetime.utcnow() - bot.timedelta(days=1))
+    await update.message.reply_text("Last 24 hours Recent Bulk Trades:")
+    for trade in trades:
+        await update.message.reply_text(bot.format_trade(trade))
+
+
+async def measure(handler, telegram, users):
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(telegram.update(), None) for _ in range(users)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Old vs batched /bulktrade reply paths")
+    parser.add_argument("--users", type=int, default=20, help="users running /bulktrade at once")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated Bot API round-trip")
+    args = parser.parse_args()
+
+    bot.trade_store.append([make_trade(i) for i in range(24)])
+
+    for label, handler in (("per-trade", legacy_bulktrade), ("batched", bot.bulktrade)):
+        telegram = MockTelegram(args.latency)
+        elapsed = asyncio.run(measure(handler, telegram, args.users))
+        print(f"{label:10s} api_calls={telegram.calls:5d}  per_command={elapsed:6.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import start_mock_server  # noqa: E402
+from commitment import CommitmentTracker  # noqa: E402
+from http_client import close_clients  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def ticker(stop, gaps):
+    # Measures how long the event loop is unavailable while transactions are pending
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        now = time.perf_counter()
+        gaps.append(now - last - 0.01)
+        last = now
+
+
+async def run(base_url, count, timeout):
+    tracker = CommitmentTracker(base_url)
+    stop, gaps = asyncio.Event(), []
+    tick = asyncio.create_task(ticker(stop, gaps))
+
+    start = time.perf_counter()
+    futures = [tracker.watch(f"{i:064x}", timeout) for i in range(count)]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await tick
+    await close_clients()
+    committed = sum(1 for r in results if not isinstance(r, Exception))
+    print(f"watched={count} committed={committed} timed_out={count - committed} "
+          f"elapsed={elapsed:.2f}s get_txn_calls={tracker.lookups} max_loop_stall={max(gaps) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Commitment tracker against a stub node")
+    parser.add_argument("--txns", type=int, default=200)
+    parser.add_argument("--max-commit-delay", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(latency=0.02, max_commit_delay=args.max_commit_delay)
+    asyncio.run(run(base_url, args.txns, args.timeout))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
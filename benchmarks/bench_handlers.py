@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import start_mock_server
+
+server, BASE_URL = start_mock_server()
+os.environ["FOCUS_API_URL"] = BASE_URL
+os.environ["FOCUS_GRAPHQL_URL"] = f"{BASE_URL}/graphql"
+os.environ.setdefault("SEED_HEX", "11" * 32)
+
+import bot  # noqa: E402
+from http_client import close_clients  # noqa: E402
+from cache import upstream_cache  # noqa: E402
+from trade_store import ingest_recent_trades  # noqa: E402
+
+# The bot's databases are opened in a scratch directory, out of the working tree
+os.chdir(tempfile.mkdtemp())
+bot.open_stores()
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+# The pre-async fetchers, which block the event loop for the whole request
+async def blocking_get_current_price():
+    response = requests.get(f"{BASE_URL}/api/v0/tokens/candlesticks/history", params={"countback": 1})
+    return response.json() if response.status_code == 200 else None
+
+
+class BlockingTradeSource:
+    # Stands in for the trade store by crawling the API synchronously, as bulktrade used to.
+    # Every refresh looks like new data, so no command reuses another's rendered pages
+    def __init__(self):
+        self.version = 0
+
+    def refresh(self):
+        self.version += 1
+
+    def newest_hash(self):
+        self.refresh()
+        return str(self.version)
+
+    def recent(self, since):
+        return blocking_get_recent_trades()
+
+
+def blocking_get_recent_trades():
+    trades, offset = [], 0
+    while len(trades) < 24:
+        response = requests.post(f"{BASE_URL}/graphql", json={"variables": {"first": 5, "offset": offset}})
+        page = response.json()["data"]["tradingRecentTrades"]
+        trades.extend(page["nodes"])
+        if not page["pageInfo"]["hasNextPage"]:
+            break
+        offset += 5
+    return trades[:24]
+
+
+def fake_update(chat_id):
+    async def reply_text(text, **kwargs):
+        return None
+    return SimpleNamespace(message=SimpleNamespace(chat_id=chat_id, reply_text=reply_text))
+
+
+async def timed(handler, chat_id, dispatched):
+    # Latency is measured from the moment all commands arrive together
+    # Plain commands, as CallbackContext has them: no arguments after the command
+    await handler(fake_update(chat_id), SimpleNamespace(args=None))
+    return time.perf_counter() - dispatched
+
+
+async def run(n):
+    if not isinstance(bot.trade_store, BlockingTradeSource):
+        await ingest_recent_trades(bot.trade_store)
+    handlers = [bot.price if i % 2 == 0 else bot.bulktrade for i in range(n)]
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(h, i, start) for i, h in enumerate(handlers)))
+    elapsed = time.perf_counter() - start
+    await close_clients()
+    return sorted(latencies), elapsed
+
+
+def report(label, latencies, elapsed):
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:10s} p50={p50 * 1000:8.1f}ms  p99={p99 * 1000:8.1f}ms  total={elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /price and /bulktrade handler latency")
+    parser.add_argument("-n", type=int, default=50, help="number of simultaneous commands")
+    args = parser.parse_args()
+
+    originals = (bot.get_current_price, bot.trade_store)
+    bot.get_current_price, bot.trade_store = blocking_get_current_price, BlockingTradeSource()
+    report("blocking", *asyncio.run(run(args.n)))
+
+    bot.get_current_price, bot.trade_store = originals
+    report("async", *asyncio.run(run(args.n)))
+    print(f"cache: {upstream_cache.stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only needed once the bot actually posts to DeSo; importing any of them at startup is a regression
+DEFERRED_MODULES = ("submit_post", "coincurve", "bip32", "mnemonic", "ecdsa", "uvicorn")
+
+
+def import_times(module):
+    # Runs a fresh interpreter with -X importtime; returns {module: (self_us, cumulative_us)}
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=tempfile.mkdtemp(), env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import cost, as seen by a restarting container")
+    parser.add_argument("--module", default="bot")
+    parser.add_argument("--runs", type=int, default=5, help="best of this many fresh interpreters")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None, help="exit non-zero if the import is slower")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times[args.module][1])
+    total_ms = best[args.module][1] / 1000
+    print(f"import {args.module}: {total_ms:.1f}ms cumulative (best of {args.runs})")
+
+    top_level = [(name, cumulative) for name, (_, cumulative) in best.items() if "." not in name and name != args.module]
+    for name, cumulative in sorted(top_level, key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    failed = False
+    eager = [name for name in DEFERRED_MODULES if name in best]
+    if eager and args.module == "bot":
+        print(f"FAIL: imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f}ms is over the {args.budget_ms:.1f}ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from state_backend import LeaderElection, SQLiteBackend  # noqa: E402
+
+
+def worker(index, path, lease, tick_seconds, until, results):
+    # One bot instance: renews its lease every loop and runs the "job" once per tick when leading
+    backend = SQLiteBackend(path)
+    election = LeaderElection(backend, owner=f"instance-{index}", lease=lease)
+    while time.time() < until:
+        tick = int(time.time() // tick_seconds)
+        if election.is_leader() and backend.add(f"tick:{tick}", ttl=60):
+            results.put((tick, index, time.time()))
+        time.sleep(lease / 6)
+    backend.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leader-elected jobs across processes sharing one SQLite state file")
+    parser.add_argument("--instances", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=12.0)
+    parser.add_argument("--lease", type=float, default=1.5)
+    parser.add_argument("--tick", type=float, default=0.5, help="seconds per simulated job interval")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "state.db")
+    SQLiteBackend(path).close()
+    results = multiprocessing.Queue()
+    start = time.time()
+    until = start + args.duration
+    processes = [
+        multiprocessing.Process(target=worker, args=(i, path, args.lease, args.tick, until, results))
+        for i in range(args.instances)
+    ]
+    for process in processes:
+        process.start()
+
+    # Kill whichever instance leads at the halfway point, as a crash would
+    time.sleep(args.duration / 2)
+    runs = []
+    while not results.empty():
+        runs.append(results.get())
+    leader = runs[-1][1] if runs else 0
+    killed_at = time.time()
+    processes[leader].kill()
+
+    for process in processes:
+        process.join()
+    while not results.empty():
+        runs.append(results.get())
+
+    per_tick = Counter(tick for tick, _, _ in runs)
+    first, last = int(start // args.tick) + 1, int(until // args.tick) - 1
+    expected = range(first, last + 1)
+    duplicates = sum(1 for tick in expected if per_tick[tick] > 1)
+    missed = [tick for tick in expected if per_tick[tick] == 0]
+    takeover = min((at for _, index, at in runs if index != leader and at > killed_at), default=None)
+    print(f"{args.instances} instances, {len(expected)} ticks: {len(runs)} job runs, "
+          f"{duplicates} duplicated, {len(missed)} missed")
+    print(f"runs per instance: {dict(Counter(index for _, index, _ in runs))}")
+    if takeover is not None:
+        print(f"instance-{leader} killed; a new leader ran its first job {takeover - killed_at:.2f}s later "
+              f"(lease {args.lease}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics  # noqa: E402
+
+
+def per_call(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def record():
+    metrics.upstream_latency.observe(0.042, "focus.xyz", "/api/v0/tokens/candlesticks/history", "200")
+    metrics.broadcast_messages.inc("sent")
+
+
+async def scrape(port):
+    server = await metrics.start_metrics_server("127.0.0.1", port)
+    port = server.sockets[0].getsockname()[1]
+    start = time.perf_counter()
+    body = await asyncio.to_thread(lambda: urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read())
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    return body, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of recording metrics on the hot path")
+    parser.add_argument("-n", type=int, default=1000000)
+    args = parser.parse_args()
+
+    baseline = per_call(lambda: None, args.n)
+    metrics.enabled = False
+    disabled = per_call(record, args.n) - baseline
+    metrics.enabled = True
+    enabled = per_call(record, args.n) - baseline
+    print(f"histogram + counter: {disabled:6.1f}ns disabled, {enabled:6.1f}ns enabled")
+
+    body, elapsed = asyncio.run(scrape(0))
+    print(f"scrape: {len(body.splitlines())} lines, {len(body)} bytes in {elapsed * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
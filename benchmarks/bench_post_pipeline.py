@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import start_mock_server  # noqa: E402
+from commitment import CommitmentTracker  # noqa: E402
+from http_client import close_clients  # noqa: E402
+from post_pipeline import PostPipeline  # noqa: E402
+from submit_post import DeSoDexClient  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("post_pipeline").setLevel(logging.WARNING)
+
+PUBLIC_KEY = "BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ"
+
+
+def message(i):
+    return f"🚀 $TOKEN surged by {10 + i % 7:.2f}% in the last 15 minutes! New LTP: {11.7 + i / 100:.2f} DeSo."
+
+
+async def sequential(client, tracker, count):
+    # construct -> sign -> submit -> wait for every post in turn, as post_to_deso does
+    fee = 0
+    for i in range(count):
+        constructed = await asyncio.to_thread(client.submit_post, PUBLIC_KEY, message(i))
+        fee += constructed.get("FeeNanos", 0)
+        submitted = await asyncio.to_thread(client.sign_and_submit_txn, constructed)
+        await tracker.wait(submitted["TxnHashHex"], 30.0)
+    return {"posts": count, "transactions": count, "fee_nanos_per_post": fee / count}
+
+
+async def pipelined(client, tracker, count, burst, atomic):
+    pipeline = PostPipeline(client, PUBLIC_KEY, tracker, coalesce_window=0.2, atomic=atomic)
+    futures = []
+    for i in range(count):
+        futures.append(pipeline.enqueue(message(i)))
+        # Alerts arrive in bursts of `burst`, a little apart
+        if (i + 1) % burst == 0:
+            await asyncio.sleep(0.05)
+    await asyncio.gather(*futures)
+    await pipeline.close()
+    return pipeline.stats()
+
+
+def run(label, coro_fn, count):
+    async def scenario():
+        # The pooled clients belong to this scenario's event loop, so they are closed before it is
+        try:
+            return await coro_fn()
+        finally:
+            await close_clients()
+
+    start = time.perf_counter()
+    # The client prints every node error; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = asyncio.run(scenario())
+    elapsed = time.perf_counter() - start
+    print(f"{label:18s} {count / elapsed:7.2f} posts/s  {stats['transactions']:4d} txns  "
+          f"{stats['fee_nanos_per_post']:8.1f} nanos fee/post")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Post throughput against a stub DeSo node")
+    parser.add_argument("-n", type=int, default=40, help="posts to make")
+    parser.add_argument("--burst", type=int, default=4, help="alerts arriving together")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--commit-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(latency=args.latency, max_commit_delay=args.commit_delay)
+    client = DeSoDexClient(seed_phrase_or_hex="11" * 32, node_url=base_url)
+
+    def tracker():
+        return CommitmentTracker(base_url)
+
+    run("sequential", lambda: sequential(client, tracker(), args.n), args.n)
+    run("pipelined", lambda: pipelined(client, tracker(), args.n, args.burst, atomic=False), args.n)
+    run("pipelined+atomic", lambda: pipelined(client, tracker(), args.n, args.burst, atomic=True), args.n)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
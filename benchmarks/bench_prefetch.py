@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import start_mock_server  # noqa: E402
+
+server, BASE_URL = start_mock_server()
+os.environ["FOCUS_API_URL"] = BASE_URL
+
+import history_get  # noqa: E402
+from cache import seconds_until, upstream_cache  # noqa: E402
+from http_client import close_clients  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def warm(candle, delay):
+    # The warm_price job: once per candle, just after it opens
+    while True:
+        await asyncio.sleep(seconds_until(candle, delay))
+        await history_get.refresh_current_price()
+
+
+async def close_candles(candle):
+    # candle_ttl expires the cached price at each close; the compressed candle does the same by hand
+    while True:
+        await asyncio.sleep(seconds_until(candle))
+        upstream_cache.invalidate(("price", history_get.TOKEN_SYMBOL, "15M"))
+
+
+async def alert_bursts(candle, settle, size, latencies):
+    # Subscribers answering the alert sent just after each close all ask for /price at once
+    async def one():
+        start = time.perf_counter()
+        await history_get.get_current_price()
+        latencies.append(time.perf_counter() - start)
+
+    while True:
+        await asyncio.sleep(seconds_until(candle, settle))
+        await asyncio.gather(*(one() for _ in range(size)))
+
+
+async def users(duration, rate):
+    # Poisson arrivals of /price; returns how long each one waited for its price
+    latencies = []
+
+    async def one():
+        start = time.perf_counter()
+        await history_get.get_current_price()
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    until = time.monotonic() + duration
+    while time.monotonic() < until:
+        await asyncio.sleep(random.expovariate(rate))
+        tasks.append(asyncio.ensure_future(one()))
+    await asyncio.gather(*tasks)
+    return sorted(latencies)
+
+
+async def run(args, prefetch):
+    upstream_cache._entries.clear()
+    before = upstream_cache.stats()
+    burst_latencies = []
+    background = [
+        asyncio.ensure_future(close_candles(args.candle)),
+        asyncio.ensure_future(alert_bursts(args.candle, args.settle, args.burst, burst_latencies)),
+    ]
+    if prefetch:
+        background.append(asyncio.ensure_future(warm(args.candle, args.delay)))
+    latencies = await users(args.duration, args.rate)
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    after = upstream_cache.stats()
+    await close_clients()
+    latencies = sorted(latencies + burst_latencies)
+    waited = sum(1 for latency in latencies if latency > 0.01)
+    burst_waited = sum(1 for latency in burst_latencies if latency > 0.01)
+    fetched = after["misses"] - before["misses"] + after["refreshes"] - before["refreshes"]
+    return latencies, waited, burst_waited, len(burst_latencies), fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/price latency with and without the aligned prefetch job")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--rate", type=float, default=0.5, help="/price requests per second between alerts")
+    parser.add_argument("--ttl", type=float, default=2.0, help="stands in for PRICE_MAX_TTL to compress time")
+    parser.add_argument("--candle", type=float, default=10.0, help="stands in for the 15-minute candle")
+    parser.add_argument("--delay", type=float, default=0.05, help="stands in for PRICE_WARM_DELAY")
+    parser.add_argument("--settle", type=float, default=0.3, help="stands in for CANDLE_SETTLE, when the alert goes out")
+    parser.add_argument("--burst", type=int, default=50, help="/price requests right after each alert")
+    parser.add_argument("--latency", type=float, default=0.15, help="upstream round trip")
+    args = parser.parse_args()
+
+    random.seed(1)
+    server.RequestHandlerClass.latency = args.latency
+    history_get.PRICE_MAX_TTL = args.ttl
+    for label, prefetch in (("on demand", False), ("prefetched", True)):
+        latencies, waited, burst_waited, bursts, fetched = asyncio.run(run(args, prefetch))
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{label:10s} {len(latencies):5d} requests  waited on the network: {waited:4d} ({waited / len(latencies):.1%}), "
+              f"after alerts {burst_waited:4d}/{bursts}  p50={statistics.median(latencies) * 1000:7.2f}ms  "
+              f"p99={p99 * 1000:7.2f}ms  upstream fetches={fetched}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import start_mock_server  # noqa: E402
+
+server, BASE_URL = start_mock_server(latency=0.02)
+os.environ["FOCUS_API_URL"] = BASE_URL
+
+from price_alerts import evaluate_price_change  # noqa: E402
+from price_feed import PriceFeed, StreamAlertState  # noqa: E402
+from http_client import close_clients  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+async def measure(feed, shock_delay, duration):
+    # Time from the upstream crash to the evaluator deciding to alert
+    queue = feed.subscribe()
+    state = StreamAlertState(threshold=5)
+    shock_at = time.time() + shock_delay
+    server.RequestHandlerClass.shock_at = shock_at
+    task = asyncio.create_task(feed.run())
+
+    latency = None
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        try:
+            tick = await asyncio.wait_for(queue.get(), timeout=deadline - time.time())
+        except asyncio.TimeoutError:
+            break
+        result = evaluate_price_change(tick.candle)
+        if latency is None and result is not None and state.should_alert(tick.candle, result[1]):
+            latency = tick.received_at - shock_at
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await close_clients()
+    server.RequestHandlerClass.shock_at = None
+    return latency
+
+
+def report(label, feed, latency, duration):
+    shown = f"{latency:6.2f}s" if latency is not None else "   n/a"
+    print(f"{label:8s} alert_latency={shown}  upstream_requests={feed.requests:4d}  "
+          f"not_modified={feed.not_modified:4d}  over {duration:g}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alert latency of the live price feed modes")
+    parser.add_argument("--shock-after", type=float, default=8.0, help="seconds until the mock price crashes")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--min-interval", type=float, default=1.0)
+    parser.add_argument("--max-interval", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print("job      alert_latency= up to 900s (15-minute polling), 1 request per tick")
+
+    feed = PriceFeed(min_interval=args.min_interval, max_interval=args.max_interval)
+    report("poll", feed, asyncio.run(measure(feed, args.shock_after, args.duration)), args.duration)
+
+    feed = PriceFeed(stream_url=f"{BASE_URL}/api/v0/stream/candles")
+    report("stream", feed, asyncio.run(measure(feed, args.shock_after, args.duration)), args.duration)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
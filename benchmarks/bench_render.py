@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import make_candle, make_trade  # noqa: E402
+from render import TradeRenderer, price_message  # noqa: E402
+
+
+def legacy_format_trade(trade):
+    # The per-request formatter: parses the timestamp and rebuilds every line each time
+    trade_time = datetime.fromisoformat(trade['tradeTimestamp'].replace('Z', '+00:00')).astimezone(timezone.utc)
+    time_diff = datetime.now(timezone.utc) - trade_time
+    if time_diff.seconds >= 3600:
+        time_ago = f"{time_diff.seconds // 3600} hours ago"
+    else:
+        time_ago = f"{time_diff.seconds // 60} minutes ago"
+    return (
+        f"Trade Type: {trade.get('tradeType', 'N/A')}\n"
+        f"Trader: {trade.get('traderUsername', 'Unknown')}\n"
+        f"Value (USD): ${trade.get('tradeValueUsd', 0):,.2f}\n"
+        f"Price (USD): ${trade.get('tradePriceUsd', 0):,.2f}\n"
+        f"Traded (DeSo): {trade.get('tradeValueDeso', 0):,.2f}\n"
+        f"Timestamp: {time_ago}\n"
+        "---------------------------"
+    )
+
+
+def legacy_price(data):
+    return (
+        f"Current Price Details:\n"
+        f"Open Price: {data.get('open')}\n"
+        f"Close Price: {data.get('close')}\n"
+        f"Day High: {data.get('high')}\n"
+        f"Day Low: {data.get('low')}\n"
+        f"Volume: {data.get('volume')}\n"
+        f"Current Time: {data.get('timestamp')}"
+    )
+
+
+def per_1k(fn, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - start) / requests * 1000 * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Message rendering cost per 1k requests")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--trades", type=int, default=24)
+    args = parser.parse_args()
+
+    trades = [make_trade(i) for i in range(args.trades)]
+    candle = make_candle(int(time.time() * 1000))
+    header = "Last 24 hours Recent Bulk Trades:"
+
+    renderer = TradeRenderer()
+    pages = renderer.pages(header, trades)
+    rows = [
+        ("bulktrade legacy", lambda: "\n".join([header, *(legacy_format_trade(t) for t in trades)])),
+        ("bulktrade first", lambda: [page.render() for page in TradeRenderer().pages(header, trades)]),
+        ("bulktrade repeat", lambda: pages[0].render()),
+        ("price legacy", lambda: legacy_price(candle)),
+        ("price repeat", lambda: price_message(candle)),
+    ]
+    for label, fn in rows:
+        print(f"{label:18s} {per_1k(fn, args.requests):9.2f}ms per 1k requests")
+    # New data version: the records are reused, only the page layout is redone
+    print(f"{'bulktrade new data':18s} {per_1k(lambda: renderer.pages(header, trades)[0].render(), args.requests):9.2f}ms per 1k requests")
+
+
+if __name__ == "__main__":
+    main()
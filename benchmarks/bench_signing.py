@@ -0,0 +1,51 @@
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ecdsa import SECP256k1, SigningKey, VerifyingKey  # noqa: E402
+from ecdsa.util import sigdecode_der, sigencode_der  # noqa: E402
+from submit_post import DeSoDexClient, create_key_pair_from_seed_or_seed_hex  # noqa: E402
+
+SEED_HEX = "11" * 32
+MNEMONIC = "abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about"
+
+
+def rate(label, fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:32s} {n / elapsed:12.1f}/s  ({elapsed / n * 1e6:9.1f}us each)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Key derivation and transaction signing throughput")
+    parser.add_argument("-n", type=int, default=2000, help="signatures per backend")
+    args = parser.parse_args()
+
+    rate("derive keypair (seed hex)", lambda: create_key_pair_from_seed_or_seed_hex(SEED_HEX, "", 0, False), 200)
+    rate("derive keypair (mnemonic)", lambda: create_key_pair_from_seed_or_seed_hex(MNEMONIC, "", 0, False), 20)
+
+    client = DeSoDexClient(seed_phrase_or_hex=SEED_HEX)
+    txn_hex = os.urandom(300).hex()
+    txn_hash = hashlib.sha256(hashlib.sha256(bytes.fromhex(txn_hex)).digest()).digest()
+
+    # The previous path rebuilt an ecdsa key for every transaction
+    def ecdsa_sign():
+        key = SigningKey.from_string(client.deso_keypair.private_key, curve=SECP256k1)
+        return key.sign_digest(txn_hash, sigencode=sigencode_der)
+
+    rate("sign (ecdsa, key per txn)", ecdsa_sign, max(1, args.n // 10))
+    rate("sign (coincurve, cached key)", lambda: client.sign_single_txn(txn_hex), args.n)
+
+    # Both backends must produce signatures the other side can verify
+    verifying_key = VerifyingKey.from_string(client.deso_keypair.public_key, curve=SECP256k1)
+    signature = bytes.fromhex(client.sign_single_txn(txn_hex))
+    assert verifying_key.verify_digest(signature, txn_hash, sigdecode=sigdecode_der)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from mock_upstream import start_mock_server  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Command scenarios run `--requests` updates at `--concurrency`; job scenarios run back to back like the JobQueue
+COMMANDS = {
+    "price": ("/price", []),
+    "price_window": ("/price", ["1h"]),
+    "change": ("/change", ["4h"]),
+    "bulktrade": ("/bulktrade", []),
+    "stats": ("/stats", []),
+    "subscribe": ("/subscribe", []),
+}
+JOBS = ("refresh_candles", "ingest_trades", "broadcast", "post")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end bot.py handlers against the mock upstream; writes JSON results")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput/p95 regression vs the baseline")
+    parser.add_argument("--scenarios", default=",".join([*COMMANDS, *JOBS]))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--jobs", type=int, default=5, help="runs of each job scenario")
+    parser.add_argument("--subscribers", type=int, default=200, help="chats each broadcast is sent to")
+    parser.add_argument("--latency", type=float, default=0.05, help="upstream latency per request")
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="upstream and Bot API calls answered 503")
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="Bot API calls answered 429 with retry_after")
+    parser.add_argument("--forbidden-rate", type=float, default=0.0, help="sendMessage calls answered 403 blocked")
+    parser.add_argument("--recording", help="serve candles and trades from a replay recording")
+    return parser.parse_args()
+
+
+args = parse_args()
+output = os.path.abspath(args.output)
+baseline = os.path.abspath(args.baseline) if args.baseline else None
+recording = os.path.abspath(args.recording) if args.recording else None
+server, BASE_URL = start_mock_server(latency=args.latency, telegram_latency=args.telegram_latency,
+                                     error_rate=args.error_rate, retry_after_rate=args.retry_after_rate,
+                                     forbidden_rate=args.forbidden_rate, recording=recording)
+mock = server.RequestHandlerClass
+os.environ["FOCUS_API_URL"] = BASE_URL
+os.environ["FOCUS_GRAPHQL_URL"] = f"{BASE_URL}/graphql"
+os.environ["DESO_NODE_URL"] = BASE_URL
+os.environ["STATE_BACKEND"] = "memory"
+os.environ.setdefault("SEED_HEX", "11" * 32)
+os.environ.setdefault("PUBLIC_KEY", "BC1YLmockPublicKey")
+
+import bot  # noqa: E402
+from cache import upstream_cache  # noqa: E402
+from http_client import close_clients  # noqa: E402
+from telegram import Update  # noqa: E402
+from telegram.ext import Application, CallbackContext  # noqa: E402
+
+# The bot's databases are opened in a scratch directory, out of the working tree
+os.chdir(tempfile.mkdtemp())
+bot.open_stores()
+
+
+def command_update(update_id, chat_id, command, command_args):
+    text = " ".join([command, *command_args])
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else None
+
+
+def counts_delta(before, after):
+    return {key: after[key] - before.get(key, 0) for key in after if after[key] != before.get(key, 0)}
+
+
+async def measure(operations, concurrency):
+    # Returns per-operation latencies and the error count; latency includes queueing behind the semaphore
+    gate = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(operation):
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            try:
+                await operation()
+            except Exception as e:
+                errors += 1
+                logging.debug(f"operation failed: {e}")
+            return time.perf_counter() - started
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(operation) for operation in operations))
+    return sorted(latencies), time.perf_counter() - start, errors
+
+
+def command_operations(application, name, count):
+    command, command_args = COMMANDS[name]
+    handler = getattr(bot, command.lstrip("/"))
+
+    def operation(i):
+        async def run():
+            update = Update.de_json(command_update(i, 10000 + i, command, command_args), application.bot)
+            context = CallbackContext.from_update(update, application)
+            context.args = list(command_args)
+            await handler(update, context)
+        return run
+    return [operation(i) for i in range(count)]
+
+
+def job_operations(application, name, count):
+    context = CallbackContext(application)
+    if name == "broadcast":
+        for chat_id in range(1, args.subscribers + 1):
+            bot.subscribers.add(chat_id)
+        return [lambda: bot.broadcast_message(context, "📉 $TOKEN dropped by 12.00% in the last 15 minutes!")] * count
+    if name == "post":
+        async def post():
+            await bot.post_pipeline().enqueue(f"Benchmark post at {time.time()}")
+        return [post] * count
+    return [lambda: getattr(bot, name)(context)] * count
+
+
+async def run_suite(scenarios):
+    application = Application.builder().token("123:MOCK").base_url(f"{BASE_URL}/bot").build()
+    results = {}
+    async with application:
+        for name in scenarios:
+            upstream_before, telegram_before = dict(mock.upstream_calls), dict(mock.telegram_calls)
+            faults_before = dict(mock.telegram_faults)
+            cache_before = upstream_cache.stats()
+            if name in COMMANDS:
+                operations, concurrency = command_operations(application, name, args.requests), args.concurrency
+            else:
+                operations, concurrency = job_operations(application, name, args.jobs), 1
+            latencies, elapsed, errors = await measure(operations, concurrency)
+            cache_after = upstream_cache.stats()
+            results[name] = {
+                "operations": len(operations),
+                "concurrency": concurrency,
+                "errors": errors,
+                "elapsed": round(elapsed, 4),
+                "throughput": round(len(operations) / elapsed, 2),
+                "latency_ms": {label: round(percentile(latencies, q) * 1000, 2)
+                               for label, q in (("p50", 0.5), ("p90", 0.9), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))},
+                "upstream_calls": counts_delta(upstream_before, mock.upstream_calls),
+                "telegram_calls": counts_delta(telegram_before, mock.telegram_calls),
+                "telegram_faults": counts_delta(faults_before, mock.telegram_faults),
+                "cache": {key: cache_after[key] - cache_before[key] for key in ("hits", "misses", "coalesced", "stale_served")},
+            }
+            print(f"{name:15s} {results[name]['throughput']:9.1f} ops/s  p50={results[name]['latency_ms']['p50']:8.1f}ms  "
+                  f"p95={results[name]['latency_ms']['p95']:8.1f}ms  errors={errors}  "
+                  f"upstream={sum(results[name]['upstream_calls'].values())}  "
+                  f"telegram={sum(results[name]['telegram_calls'].values())}  "
+                  f"telegram faults={sum(results[name]['telegram_faults'].values())}")
+        if "submit_post" in sys.modules:
+            from submit_post import close_post_pipeline
+            await close_post_pipeline()
+    await close_clients()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous, tolerance):
+    # A scenario regresses when it loses throughput or its p95 grows beyond the tolerance
+    regressions = []
+    for name, result in results.items():
+        old = previous.get("scenarios", {}).get(name)
+        if old is None:
+            continue
+        throughput = result["throughput"] / old["throughput"] - 1 if old["throughput"] else 0.0
+        p95 = result["latency_ms"]["p95"] / old["latency_ms"]["p95"] - 1 if old["latency_ms"]["p95"] else 0.0
+        print(f"{name:15s} throughput {throughput:+7.1%}  p95 {p95:+7.1%}")
+        if throughput < -tolerance or p95 > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = [name for name in scenarios if name not in COMMANDS and name not in JOBS]
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(unknown)}")
+
+    results = asyncio.run(run_suite(scenarios))
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        },
+        "scenarios": results,
+    }
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"results written to {output}")
+    server.shutdown()
+
+    if baseline:
+        with open(baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print(f"FAIL: regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trade_stats import TradeStatsCache  # noqa: E402
+from trade_store import TradeStore  # noqa: E402
+
+
+def synthetic_trades(n, traders, now, start=0):
+    rng = random.Random(3 + start)
+    for i in range(start, start + n):
+        trader = rng.randrange(traders)
+        yield {
+            "txnHashHex": f"{i:064x}",
+            "tradeTimestamp": (now - timedelta(seconds=rng.uniform(0, 86000) if not start else 0)).isoformat(),
+            "tradeType": rng.choice(("BUY", "SELL")),
+            "traderUsername": f"trader{trader}" if trader % 7 else None,
+            "tradeValueUsd": rng.paretovariate(1.3) * 50,
+            "tradeValueDeso": 0.0,
+            "tradePriceUsd": 11.75 * (1 + rng.gauss(0, 0.02)),
+            "traderPublicKey": f"BC1YLtrader{trader}",
+        }
+
+
+def python_stats(rows):
+    # Row-at-a-time reference for the same aggregates
+    volume = buy = tokens = 0.0
+    by_trader = {}
+    for _, _, trade_type, key, _, value, price in rows:
+        if not value or not price or value <= 0 or price <= 0:
+            continue
+        volume += value
+        buy += value if trade_type == "BUY" else 0.0
+        tokens += value / price
+        by_trader[key] = by_trader.get(key, 0.0) + value
+    top = sorted(by_trader.values(), reverse=True)[:5]
+    return volume / tokens, buy, top
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/stats over a full 24h window of trades")
+    parser.add_argument("-n", type=int, default=50000, help="trades in the window")
+    parser.add_argument("--traders", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100, help="trades stored per ingestion run")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    store = TradeStore(os.path.join(tempfile.mkdtemp(), "trades.db"))
+    store.append(list(synthetic_trades(args.n, args.traders, now)))
+    cache = TradeStatsCache(store)
+
+    cold_ms, stats = timed(lambda: cache.get(now))
+    python_ms, (vwap, buy, top) = timed(lambda: python_stats(store.rows_after(0, (now - timedelta(days=1)).isoformat())))
+    assert abs(stats.vwap - vwap) < 1e-9 * vwap and abs(stats.buy_usd - buy) < 1e-6 * buy
+    assert [volume for _, volume, _ in stats.top_traders] == top
+
+    incremental, memoized, aggregate = [], [], []
+    for run in range(args.runs):
+        store.append(list(synthetic_trades(args.batch, args.traders, now, start=args.n + run * args.batch)))
+        incremental.append(timed(lambda: cache.get(now))[0])
+        memoized.append(timed(lambda: cache.get(now))[0])
+        aggregate.append(timed(cache.columns.stats)[0])
+
+    print(f"{len(cache.columns)} trades, {args.traders} traders")
+    print(f"first /stats       {cold_ms:8.2f}ms (full load + aggregate)")
+    print(f"python reference   {python_ms:8.2f}ms (query + row loop)")
+    print(f"after new trades   {min(incremental):8.2f}ms (load {args.batch} + aggregate)")
+    print(f"aggregate only     {min(aggregate):8.2f}ms")
+    print(f"memoized           {min(memoized):8.3f}ms")
+    print(stats.message())
+
+
+if __name__ == "__main__":
+    main()
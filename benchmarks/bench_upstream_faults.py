@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import start_mock_server
+
+server, BASE_URL = start_mock_server(latency=0.02, error_rate=0.15, reset_rate=0.05, slow_rate=0.05, slow_latency=1.0)
+os.environ["FOCUS_API_URL"] = BASE_URL
+
+import httpx  # noqa: E402
+import upstream  # noqa: E402
+from cache import TTLCache  # noqa: E402
+from commitment import CommitmentTracker  # noqa: E402
+from history_get import fetch_current_price  # noqa: E402
+from http_client import close_clients, get_async_client  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("upstream").setLevel(logging.ERROR)
+logging.getLogger("history_get").setLevel(logging.ERROR)
+
+CANDLE_URL = f"{BASE_URL}/api/v0/tokens/candlesticks/history"
+
+
+async def plain_fetch():
+    # One attempt, as the handlers behaved before the resilient client
+    try:
+        response = await get_async_client().get(CANDLE_URL, params={"countback": 1})
+    except httpx.TransportError:
+        return None
+    return response.json() if response.status_code == 200 else None
+
+
+async def measure(fetch, n, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            data = await fetch()
+            return data is not None, time.perf_counter() - start
+
+    results = await asyncio.gather(*(one() for _ in range(n)))
+    await close_clients()
+    latencies = sorted(latency for _, latency in results)
+    return sum(ok for ok, _ in results) / n, latencies
+
+
+def report(label, success, latencies):
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:22s} success={success * 100:5.1f}%  p50={p50 * 1000:7.1f}ms  p99={p99 * 1000:7.1f}ms")
+
+
+async def outage(requests_during_outage):
+    # Warm the cache, take the upstream down, and count what reaches the network
+    upstream._breakers.clear()
+    cache = TTLCache()
+    key = ("price", "bench")
+    await cache.get_or_fetch(key, fetch_current_price, ttl=0.0)
+    server.RequestHandlerClass.error_rate = 1.0
+    breaker = upstream.breaker_for(CANDLE_URL)
+    attempts = 0
+    served = 0
+    for _ in range(requests_during_outage):
+        failures_before = breaker.failures
+        value = await cache.get_or_fetch(key, fetch_current_price, ttl=0.0)
+        attempts += breaker.failures - failures_before
+        served += value is not None
+    await close_clients()
+    server.RequestHandlerClass.error_rate = 0.15
+    upstream._breakers.clear()
+    return attempts, served, breaker.state, cache.stale_served
+
+
+async def hedged_lookups(n, secondary_url):
+    tracker = CommitmentTracker(BASE_URL, secondary_node_url=secondary_url)
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        try:
+            await tracker._is_committed(f"{i:064x}")
+        except Exception:
+            pass
+        latencies.append(time.perf_counter() - start)
+    await close_clients()
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upstream resilience against a fault-injecting stub")
+    parser.add_argument("-n", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    print("faults: 15% 503, 5% connection reset, 5% stalled 1s")
+
+    report("single attempt", *asyncio.run(measure(plain_fetch, args.n, args.concurrency)))
+    report("retry + backoff", *asyncio.run(measure(fetch_current_price, args.n, args.concurrency)))
+
+    attempts, served, state, stale = asyncio.run(outage(args.n))
+    print(f"outage: {args.n} lookups, {attempts} upstream attempts, {served} answered ({stale} stale), breaker {state}")
+
+    # Both nodes stall 5% of lookups; hedging to the second cuts the tail
+    secondary, secondary_url = start_mock_server(latency=0.02, slow_rate=0.05, slow_latency=1.0)
+    server.RequestHandlerClass.error_rate = server.RequestHandlerClass.reset_rate = 0.0
+    lookups = max(50, args.n // 5)
+    report("get-txn single node", 1.0, asyncio.run(hedged_lookups(lookups, None)))
+    report("get-txn hedged", 1.0, asyncio.run(hedged_lookups(lookups, secondary_url)))
+    secondary.shutdown()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
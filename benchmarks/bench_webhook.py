@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_upstream import start_mock_server  # noqa: E402
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from telegram.ext import Application, CommandHandler  # noqa: E402
+from webhook import WEBHOOK_PATH, WebhookApp  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Telegram redelivers an update the webhook answered 503 for; this stands in for its retry delay
+REDELIVERY_DELAY = 0.1
+
+
+def synthetic_update(update_id, chat_id):
+    # A private-chat /price command, shaped like what Telegram posts to the webhook
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Load"},
+            "text": "/price",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 6}],
+        },
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run(mock_url, updates, senders, concurrency, work):
+    handled = 0
+    # 503s from the webhook once its backlog is past MAX_PENDING_UPDATES
+    rejected = 0
+    done = asyncio.Event()
+
+    async def price(update, context):
+        # Stands in for a handler that awaits an upstream fetch, then replies through the mock Bot API
+        nonlocal handled
+        await asyncio.sleep(work)
+        await update.message.reply_text("Current Price Details: ...")
+        handled += 1
+        if handled == updates:
+            done.set()
+
+    application = (Application.builder().token("123:MOCK").base_url(f"{mock_url}/bot")
+                   .updater(None).concurrent_updates(concurrency).build())
+    application.add_handler(CommandHandler("price", price))
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(WebhookApp(application), host="127.0.0.1", port=port,
+                                           log_level="warning", lifespan="off"))
+    async with application:
+        await application.start()
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+
+        queue = asyncio.Queue()
+        for i in range(updates):
+            queue.put_nowait(i)
+
+        async def sender(client):
+            nonlocal rejected
+            while not queue.empty():
+                i = queue.get_nowait()
+                while True:
+                    response = await client.post(f"http://127.0.0.1:{port}{WEBHOOK_PATH}",
+                                                 json=synthetic_update(i, i % 500))
+                    if response.status_code != 503:
+                        break
+                    rejected += 1
+                    await asyncio.sleep(REDELIVERY_DELAY)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=senders)) as client:
+            await asyncio.gather(*(sender(client) for _ in range(senders)))
+            acked = time.perf_counter() - start
+            await done.wait()
+            handled_in = time.perf_counter() - start
+            health = (await client.get(f"http://127.0.0.1:{port}/health")).json()
+
+        server.should_exit = True
+        await serving
+        await application.stop()
+    return acked, handled_in, rejected, health
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic webhook load against the ASGI endpoint")
+    parser.add_argument("-n", type=int, default=2000, help="updates to post")
+    parser.add_argument("--senders", type=int, default=50, help="concurrent HTTP senders")
+    parser.add_argument("--work", type=float, default=0.05, help="simulated handler I/O per update")
+    args = parser.parse_args()
+
+    server, mock_url = start_mock_server(telegram_latency=0.01)
+    for concurrency in (1, 64, 256):
+        acked, handled, rejected, health = asyncio.run(run(mock_url, args.n, args.senders, concurrency, args.work))
+        print(f"concurrency={concurrency:4d}  acked {args.n / acked:8.1f} updates/s  "
+              f"handled {args.n / handled:8.1f} updates/s  503s {rejected:5d}  health={health}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from whale_alerts import WhaleWatcher  # noqa: E402
+
+
+def make_page(now, start, size, rng):
+    # Each poll returns the last few minutes again, so most hashes are repeats
+    page = []
+    for i in range(start, start + size):
+        page.append({
+            "txnHashHex": f"{i:064x}",
+            "tradeTimestamp": (now - timedelta(seconds=rng.uniform(0, 120))).isoformat(),
+            "tradeType": rng.choice(("BUY", "SELL")),
+            "traderUsername": f"whale{rng.randrange(20)}",
+            "tradeValueUsd": rng.uniform(10000, 80000),
+            "tradeValueDeso": rng.uniform(800, 7000),
+            "tradePriceUsd": 11.6,
+        })
+    return page
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whale-trade dedupe and burst aggregation per polling interval")
+    parser.add_argument("--ticks", type=int, default=10000)
+    parser.add_argument("--new-per-tick", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    watcher = WhaleWatcher()
+    now = datetime.utcnow()
+    observed = alerts = 0
+    elapsed = 0.0
+    for tick in range(args.ticks):
+        first = max(0, (tick + 1) * args.new_per_tick - args.page_size)
+        page = make_page(now, first, args.page_size, rng)
+        start = time.perf_counter()
+        observed += watcher.observe(page, now=now)
+        alerts += len(watcher.drain())
+        elapsed += time.perf_counter() - start
+    print(f"{observed} new whale trades folded into {alerts} alerts over {args.ticks} ticks")
+    print(f"{elapsed / args.ticks * 1e6:.1f}us per tick, {len(watcher._seen)} hashes remembered")
+
+
+if __name__ == "__main__":
+    main()
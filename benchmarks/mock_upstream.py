@@ -0,0 +1,379 @@
+import argparse
+import base64
+import bisect
+import hashlib
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TOKEN_PUBLIC_KEY = "BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ"
+QUOTE_PUBLIC_KEY = "BC1YLiwTN3DbkU8VmD7F7wXcRR1tFX6jDEkLyruHD2WsH3URomimxLX"
+CANDLE_MS = 900000
+
+
+def load_fixtures(path, now=None):
+    # Loads a replay recording and shifts it so its last candle is the one forming now,
+    # which keeps the bot's "last 24 hours" and "last 15 minutes" windows populated
+    from replay import load_recording
+    candles, trades = load_recording(path)
+    if not candles:
+        raise ValueError(f"{path} has no candles")
+    now_ms = int((time.time() if now is None else now) * 1000)
+    offset_ms = now_ms - now_ms % CANDLE_MS - int(candles[-1]["time"])
+    shifted_candles = []
+    for candle in candles:
+        ts_ms = int(candle["time"]) + offset_ms
+        shifted_candles.append(dict(candle, time=str(ts_ms),
+                                    timestamp=datetime.utcfromtimestamp(ts_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")))
+    shifted_trades = []
+    for trade in reversed(trades):
+        at = datetime.fromisoformat(trade["tradeTimestamp"]) + timedelta(milliseconds=offset_ms)
+        shifted_trades.append(dict(trade, tradeTimestamp=at.isoformat()))
+    # Candles oldest first for bisecting on time; trades newest first, as the query orders them
+    return shifted_candles, shifted_trades
+
+
+def make_candle(ts_ms, period_ms=900000):
+    # Deterministic wavy prices so aggregation and alerts have something to work with
+    ts_ms -= ts_ms % period_ms
+    step = ts_ms // period_ms
+    open_ = 11.757702800623075 + 0.3 * ((step % 20) - 10) / 10
+    close = open_ * (1.012 if step % 3 else 0.99)
+    return {
+        "timestamp": datetime.utcfromtimestamp(ts_ms / 1000).strftime("%Y-%m-%d %H:%M:%S"),
+        "time": str(ts_ms),
+        "open": open_,
+        "close": close,
+        "high": max(open_, close) * 1.005,
+        "low": min(open_, close) * 0.995,
+        "volume": 1000 + step % 500,
+    }
+
+
+def make_trade(i):
+    ts = datetime.utcnow() - timedelta(minutes=7 * i)
+    return {
+        "tradeTimestamp": ts.isoformat(),
+        "tradeType": "BUY" if i % 2 == 0 else "SELL",
+        "traderPublicKey": f"BC1YLtrader{i % 5}",
+        "traderUsername": f"trader{i % 5}",
+        "tokenPublicKey": TOKEN_PUBLIC_KEY,
+        "tradeValueUsd": 10000 + 250 * i,
+        "tradeValueDeso": 850 + 20 * i,
+        "tradePriceUsd": 11.649012820480072,
+        "tradePriceDeso": 0.9922498143509431,
+        "txnHashHex": f"{i:064x}",
+        "tradeBuyQuantity": 2253.2 + i,
+        "tradeSellQuantity": 26254.4 + i,
+        "__typename": "TradingRecentTrade",
+    }
+
+
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    # Emulates the focus.xyz candle history, the tradingRecentTrades GraphQL query and a DeSo node
+    protocol_version = "HTTP/1.1"
+    latency = 0.05
+    total_trades = 24
+    max_page_size = 100
+    # Candles after this epoch time have their close knocked down by shock_factor
+    shock_at = None
+    shock_factor = 0.85
+    sse_interval = 0.5
+    # Stub DeSo node: each transaction commits after a random delay up to this many seconds
+    max_commit_delay = 2.0
+    commit_times = {}
+    # Fault injection: share of requests answered 503, reset without a response, or stalled
+    error_rate = 0.0
+    reset_rate = 0.0
+    slow_rate = 0.0
+    slow_latency = 2.0
+    # Bot API stand-in served under /bot<token>/<method>; calls are counted per method.
+    # The fault rates above apply to it too, plus flood control (429 with retry_after) and, for
+    # sendMessage, chats that blocked the bot (403); getMe is spared so the application can start
+    telegram_latency = 0.02
+    telegram_calls = {}
+    retry_after_rate = 0.0
+    retry_after = 1
+    forbidden_rate = 0.0
+    # Injected Bot API errors by "method:status"
+    telegram_faults = {}
+    # Upstream requests by endpoint, for call-count regressions
+    upstream_calls = {}
+    # From load_fixtures: recorded candles and trades served instead of the synthetic ones
+    fixture_candles = None
+    fixture_trades = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, body, status=200, etag=False):
+        data = json.dumps(body).encode()
+        if etag:
+            tag = '"%s"' % hashlib.sha1(data).hexdigest()
+            if self.headers.get("If-None-Match") == tag:
+                self.send_response(304)
+                self.send_header("ETag", tag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if etag:
+            self.send_header("ETag", tag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def candle(self, ts_ms):
+        candle = make_candle(ts_ms)
+        if self.shock_at is not None and time.time() >= self.shock_at:
+            candle["close"] = candle["open"] * self.shock_factor
+            candle["low"] = min(candle["low"], candle["close"])
+        return candle
+
+    def stream_candles(self):
+        # Server-sent events: the forming candle every sse_interval seconds
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while True:
+                event = json.dumps(self.candle(int(time.time() * 1000)))
+                self.wfile.write(f"data: {event}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(self.sse_interval)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def count(self, endpoint):
+        calls = type(self).upstream_calls
+        calls[endpoint] = calls.get(endpoint, 0) + 1
+
+    def history(self, to_ms, countback):
+        if self.fixture_candles is None:
+            return [self.candle(to_ms - i * CANDLE_MS) for i in reversed(range(countback))]
+        # The recorded candles at or before `to`, oldest first like the real endpoint
+        end = bisect.bisect_right(self.fixture_candles, to_ms, key=lambda candle: int(candle["time"]))
+        return self.fixture_candles[max(0, end - countback):end]
+
+    def trades_page(self, variables):
+        first = min(variables.get("first") or 5, self.max_page_size)
+        offset = variables.get("offset") or 0
+        if variables.get("after"):
+            offset = int(base64.b64decode(variables["after"])) + 1
+        # Trades are held newest first; TRADE_TIMESTAMP_ASC pages from the other end
+        ascending = "TRADE_TIMESTAMP_ASC" in (variables.get("orderBy") or [])
+        if self.fixture_trades is None:
+            end = min(offset + first, self.total_trades)
+            indices = range(offset, end)
+            if ascending:
+                indices = [self.total_trades - 1 - i for i in indices]
+            nodes, total = [make_trade(i) for i in indices], self.total_trades
+        else:
+            # Honour the two filters the bot varies: minimum value and the start of the window
+            where = variables.get("filter") or {}
+            min_usd = where.get("tradeValueUsd", {}).get("greaterThanOrEqualTo", 0)
+            since = where.get("tradeTimestamp", {}).get("greaterThanOrEqualTo", "")
+            matching = [t for t in self.fixture_trades
+                        if (t.get("tradeValueUsd") or 0) >= min_usd and t["tradeTimestamp"] >= since]
+            if ascending:
+                matching.reverse()
+            end = min(offset + first, len(matching))
+            nodes, total = matching[offset:end], len(matching)
+        return {
+            "nodes": nodes,
+            "pageInfo": {
+                "hasNextPage": end < total,
+                "endCursor": base64.b64encode(str(end - 1).encode()).decode(),
+            },
+            "totalCount": total,
+        }
+
+    def inject_fault(self, telegram=False) -> bool:
+        # Returns True when the request was consumed by a fault; Bot API errors carry its JSON envelope
+        roll = random.random()
+        if roll < self.reset_rate:
+            # SO_LINGER 0 makes close() send a TCP reset instead of a clean FIN
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            self.close_connection = True
+            return True
+        roll -= self.reset_rate
+        if roll < self.error_rate:
+            if telegram:
+                self.telegram_error(503, "Service Unavailable")
+            else:
+                self.send_json({"error": "injected failure"}, status=503)
+            return True
+        roll -= self.error_rate
+        if roll < self.slow_rate:
+            time.sleep(self.slow_latency)
+        return False
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def read_params(self):
+        # Bot API clients send JSON or url-encoded forms whose values are JSON-encoded
+        if "json" in self.headers.get("Content-Type", ""):
+            return self.read_json()
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        params = {}
+        for key, values in form.items():
+            try:
+                params[key] = json.loads(values[0])
+            except ValueError:
+                params[key] = values[0]
+        return params
+
+    def telegram_error(self, status, description, parameters=None):
+        body = {"ok": False, "error_code": status, "description": description}
+        if parameters:
+            body["parameters"] = parameters
+        key = f"{self.path.rsplit('/', 1)[-1]}:{status}"
+        type(self).telegram_faults[key] = type(self).telegram_faults.get(key, 0) + 1
+        self.send_json(body, status=status)
+
+    def telegram_fault(self, method) -> bool:
+        roll = random.random()
+        if roll < self.retry_after_rate:
+            self.telegram_error(429, f"Too Many Requests: retry after {self.retry_after}",
+                                {"retry_after": self.retry_after})
+            return True
+        roll -= self.retry_after_rate
+        if method == "sendMessage" and roll < self.forbidden_rate:
+            self.telegram_error(403, "Forbidden: bot was blocked by the user")
+            return True
+        return False
+
+    def telegram(self, method, params):
+        # Minimal Bot API: enough for python-telegram-bot to start, reply and edit
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Mock", "username": "mock_bot"}
+        elif method in ("sendMessage", "editMessageText"):
+            chat_id = params.get("chat_id", 0)
+            result = {
+                "message_id": params.get("message_id") or random.randrange(1, 2 ** 31),
+                "date": int(time.time()),
+                "chat": {"id": int(chat_id), "type": "private"},
+                "text": params.get("text", ""),
+            }
+        elif method == "getUpdates":
+            # Nothing is ever pending; a short wait stands in for the long poll
+            time.sleep(min(float(params.get("timeout", 0)), 0.5))
+            result = []
+        else:
+            # setWebhook, deleteWebhook, answerCallbackQuery, ...
+            result = True
+        self.send_json({"ok": True, "result": result})
+
+    def do_GET(self):
+        self.count(urlparse(self.path).path)
+        time.sleep(self.latency)
+        if self.inject_fault():
+            return
+        if self.path.startswith("/api/v0/tokens/candlesticks/history"):
+            query = parse_qs(urlparse(self.path).query)
+            now_ms = int(query.get("to", [time.time() * 1000])[0])
+            countback = int(query.get("countback", [1])[0])
+            self.send_json(self.history(now_ms, countback), etag=True)
+        elif self.path.startswith("/api/v0/stream/candles"):
+            self.close_connection = True
+            self.stream_candles()
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path.startswith("/bot"):
+            params = self.read_params()
+            method = self.path.rsplit("/", 1)[-1]
+            type(self).telegram_calls[method] = type(self).telegram_calls.get(method, 0) + 1
+            time.sleep(self.telegram_latency)
+            if method != "getMe" and (self.inject_fault(telegram=True) or self.telegram_fault(method)):
+                return
+            self.telegram(method, params)
+            return
+        body = self.read_json()
+        self.count(urlparse(self.path).path)
+        time.sleep(self.latency)
+        if self.inject_fault():
+            return
+        if self.path.startswith("/graphql"):
+            self.send_json({"data": {"tradingRecentTrades": self.trades_page(body.get("variables", {}))}})
+        elif self.path.startswith("/api/v0/submit-post"):
+            # Fake unsigned txn: fixed overhead plus the body, charged at MinFeeRateNanosPerKB
+            size = 180 + len(body.get("BodyObj", {}).get("Body", "").encode())
+            fee = size * body.get("MinFeeRateNanosPerKB", 1000) // 1000
+            self.send_json({"TransactionHex": os.urandom(size).hex(), "FeeNanos": fee})
+        elif self.path.startswith("/api/v0/create-atomic-txns-wrapper"):
+            # The wrapper carries no fee of its own; the inner txns already pay theirs
+            inner = body.get("Transactions", [])
+            self.send_json({"TransactionHex": os.urandom(64).hex(), "InnerTransactionHexes": inner, "FeeNanos": 0})
+        elif self.path.startswith(("/api/v0/submit-transaction", "/api/v0/submit-atomic-transaction")):
+            self.send_json({"TxnHashHex": os.urandom(32).hex()})
+        elif self.path.startswith("/api/v0/get-txn"):
+            txn_hash = body.get("TxnHashHex")
+            now = time.time()
+            commit_at = self.commit_times.setdefault(txn_hash, now + random.uniform(0, self.max_commit_delay))
+            self.send_json({"TxnFound": now >= commit_at})
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that give up on a stalled or hedged request hang up mid-response; that is expected here
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_mock_server(host="127.0.0.1", port=0, latency=0.05, recording=None, **overrides):
+    # Returns the running server and its base URL; the server runs on a daemon thread
+    if recording is not None:
+        overrides["fixture_candles"], overrides["fixture_trades"] = load_fixtures(recording)
+    handler = type("Handler", (MockUpstreamHandler,), {
+        "latency": latency, "commit_times": {}, "telegram_calls": {}, "telegram_faults": {}, "upstream_calls": {},
+        **overrides,
+    })
+    server = MockServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Local stand-in for focus.xyz, its GraphQL API, a DeSo node and the Bot API")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="Bot API calls answered 429 with retry_after")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--forbidden-rate", type=float, default=0.0, help="sendMessage calls answered 403 blocked")
+    parser.add_argument("--recording", help="serve candles and trades from a replay recording")
+    args = parser.parse_args()
+    server, base_url = start_mock_server(
+        port=args.port, latency=args.latency, recording=args.recording, telegram_latency=args.telegram_latency,
+        error_rate=args.error_rate, reset_rate=args.reset_rate, slow_rate=args.slow_rate,
+        retry_after_rate=args.retry_after_rate, retry_after=args.retry_after, forbidden_rate=args.forbidden_rate,
+    )
+    print(f"Mock upstream listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
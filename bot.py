@@ -1,181 +1,588 @@
+import asyncio
 import logging
-from telegram import Update
-from telegram.ext import Application, CommandHandler, CallbackContext
-from history_get import get_current_price
-from recent_trades import get_recent_trades
-from submit_post import DeSoDexClient, post_to_deso
+import signal
+import sys
+from dotenv import load_dotenv
+
+# Load .env before the modules below read their settings
+load_dotenv()
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import Application, CallbackContext, CallbackQueryHandler, CommandHandler
+from history_get import fetch_closed_candle, get_current_price, refresh_current_price
+from trade_store import TradeStore, ingest_recent_trades
+from http_client import close_clients
+from cache import seconds_until, upstream_cache
+from broadcast import Broadcaster
+from subscribers import SubscriberStore
+from price_alerts import POST_THRESHOLD, evaluate_price_change
+from price_feed import PriceFeed, StreamAlertState
+from candles import CandleStore, parse_window
+from alert_rules import MAX_RULES_PER_CHAT, RuleEngine, RuleStore, parse_rule
+from watchlist import Watchlist, evaluate_watchlist, DEFAULT_THRESHOLD
+from whale_alerts import WhaleWatcher
+from render import MAX_MESSAGE_LENGTH, TradeRenderer, price_message, window_message
+from trade_stats import TradeStatsCache
+from metrics import instrument_handler, start_metrics_server
+from state_backend import LeaderElection, create_backend
 import os
-from datetime import datetime, timezone
-import json
+import time
+from datetime import datetime, timedelta
 
 # Set up logging
 logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
-SEED_HEX = os.getenv("SEED_HEX")
-PUBLIC_KEY = os.getenv("PUBLIC_KEY")
+ADMIN_USERNAME = os.getenv("TELEGRAM_USERNAME")
+# "poll" checks every 15 minutes; "stream" follows the live price feed
+PRICE_FEED_MODE = os.getenv("PRICE_FEED_MODE", "poll")
+STREAM_ALERT_THRESHOLD = float(os.getenv("STREAM_ALERT_THRESHOLD", "5"))
+# Jobs run this long after each candle or minute boundary, once the API has finalised the closed candle
+CANDLE_SETTLE = float(os.getenv("CANDLE_SETTLE", "5"))
+# A closed candle the API has not published yet is re-read this many times, CANDLE_SETTLE apart
+CLOSE_RETRIES = 3
+# The leader refetches the current price this long after each 15-minute candle opens, so the
+# /price requests an alert brings in are answered from cache
+PRICE_WARM_DELAY = 1.0
+# "polling" long-polls getUpdates; "webhook" serves updates from a local ASGI endpoint.
+# Telegram answers a second getUpdates consumer with 409 Conflict, so when several instances run in
+# polling mode only the leader polls and the rest stand by; use webhook mode to have every instance
+# serve commands
+BOT_MODE = os.getenv("BOT_MODE", "polling")
 IS_TESTNET = False
-NODE_URL = "https://test.deso.org" if IS_TESTNET else "https://node.deso.org"
+NODE_URL = os.getenv("DESO_NODE_URL", "https://test.deso.org" if IS_TESTNET else "https://node.deso.org")
 
-# Initialize DeSo client
-client = DeSoDexClient(is_testnet=IS_TESTNET, seed_phrase_or_hex=SEED_HEX, node_url=NODE_URL)
+def post_pipeline():
+    # submit_post pulls in the key derivation and signing stack, so it is imported and the
+    # DeSo client built on the first post rather than at startup
+    from submit_post import get_client, get_post_pipeline
+    get_client(is_testnet=IS_TESTNET, node_url=NODE_URL)
+    return get_post_pipeline()
 
-# Function to load chat IDs from a file
-def load_chat_ids():
-    try:
-        with open('chat_ids.json', 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return []
+# How long rendered /bulktrade pages stay available for paging
+BULKTRADE_PAGES_TTL = 300.0
+# Characters of the newest trade hash carried in paging callbacks; Telegram caps callback data at 64 bytes
+BULKTRADE_TOKEN_LENGTH = 16
+# Callback of the page counter button, answered without touching the message
+BULKTRADE_NOOP = "bulktrade:noop"
+
+# Rate-limited fan-out shared by every broadcast
+broadcaster = Broadcaster()
+
+# Rolling in-memory candles for multi-interval /price and /change
+candle_store = CandleStore()
+
+# Large trades spotted by the ingestion job, pushed to chats that ran /whales on; each trade is
+# claimed in the shared state so a new leader does not repeat alerts the previous one sent
+whale_watcher = WhaleWatcher(claim=lambda txn_hash: state.add(f"whale:{txn_hash}", ttl=WHALE_DEDUPE_TTL))
+
+# Database-backed state, opened by open_stores() when the bot starts rather than on import
+trade_store = None
+trade_stats = None
+subscribers = None
+rule_store = None
+rule_engine = None
+watchlist = None
+state = None
+election = None
+
+def open_stores() -> None:
+    global trade_store, trade_stats, subscribers, rule_store, rule_engine, watchlist, state, election
+    # Local copy of recent trades, kept current by the ingestion job
+    trade_store = TradeStore()
+    # 24h aggregates for /stats, recomputed only when new trades are stored
+    trade_stats = TradeStatsCache(trade_store)
+    # Subscribers, migrated from chat_ids.json on first start
+    subscribers = SubscriberStore()
+    # Per-subscriber alert rules, indexed by threshold and persisted to SQLite
+    rule_store = RuleStore()
+    rule_engine = rule_store.load(RuleEngine())
+    # Extra tokens monitored for price alerts, editable with /watch and /unwatch
+    watchlist = Watchlist()
+    # State shared by every instance on this host; only the leader runs jobs that post or broadcast
+    state = create_backend()
+    election = LeaderElection(state)
+
+# Closed candles are alerted on once, even if leadership moves mid-candle
+ALERT_DEDUPE_TTL = 86400
+# Whale trades stop being news after MAX_TRADE_AGE, so their claims need not outlive it by much
+WHALE_DEDUPE_TTL = 3600
+
+def leader_only(job):
+    async def wrapper(context: CallbackContext) -> None:
+        if election.is_leader():
+            await job(context)
+    wrapper.__name__ = job.__name__
+    return wrapper
 
-# Function to save chat IDs to a file
-def save_chat_ids(chat_ids):
-    with open('chat_ids.json', 'w') as file:
-        json.dump(chat_ids, file)
+async def renew_leadership(context: CallbackContext) -> None:
+    leader = election.is_leader()
+    updater = context.application.updater
+    if updater is None:
+        return
+    # In polling mode getUpdates follows the lease, so only one instance consumes updates
+    if leader and not updater.running:
+        await updater.start_polling()
+    elif not leader and updater.running:
+        await updater.stop()
+
+async def run_polling(application: Application) -> None:
+    # Replaces Application.run_polling, which would start getUpdates on every instance; renew_leadership
+    # starts and stops it instead. Runs until SIGINT or SIGTERM
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        await application.start()
+        try:
+            await stop.wait()
+        finally:
+            if application.updater.running:
+                await application.updater.stop()
+            await application.stop()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
+
+def current_rule_engine() -> RuleEngine:
+    # Applies the rules other instances added, removed or fired since the last call; the full
+    # reload only runs when this instance fell behind the whole change log
+    global rule_engine
+    if rule_store.changed() and not rule_store.sync(rule_engine):
+        logger.warning("Alert rule change log was pruned past this instance; reloading all rules")
+        rule_engine = rule_store.load(RuleEngine())
+    return rule_engine
 
 async def start(update: Update, context: CallbackContext) -> None:
-    chat_id = update.message.chat_id
-    chat_ids = load_chat_ids()
-    
-    if chat_id not in chat_ids:
-        chat_ids.append(chat_id)
-        save_chat_ids(chat_ids)
+    subscribers.add(update.message.chat_id)
     
     await update.message.reply_text('Hello! I am your trading bot. Use /bulktrade or /price or /subscribe to get started.')
 
+# Trades are parsed and laid out once; sends only fill in the relative time
+trade_renderer = TradeRenderer()
+
+def format_trade(trade) -> str:
+    return trade_renderer.record(trade).render(time.time())
+
+def paginate(header: str, blocks, limit: int = MAX_MESSAGE_LENGTH):
+    # Pack whole blocks into as few messages as fit under the length limit
+    pages = []
+    current = header
+    for block in blocks:
+        if len(current) + 1 + len(block) > limit and current != header:
+            pages.append(current)
+            current = header
+        current = f"{current}\n{block}"
+    pages.append(current)
+    return pages
+
+def render_bulktrade_pages():
+    # Laid-out pages are shared by every chat until the trade store changes; sends fill in the relative times.
+    # Keyed on the newest stored trade, which paging callbacks carry and every instance agrees on
+    key = ("bulktrade", trade_store.newest_hash()[:BULKTRADE_TOKEN_LENGTH])
+    pages = upstream_cache.get(key)
+    if pages is None:
+        trades = trade_store.recent(datetime.utcnow() - timedelta(days=1))
+        if not trades:
+            return key, []
+        pages = trade_renderer.pages("Last 24 hours Recent Bulk Trades:", trades)
+        upstream_cache.set(key, pages, ttl=BULKTRADE_PAGES_TTL)
+    return key, pages
+
+def bulktrade_keyboard(token: str, page: int, total: int):
+    if total <= 1:
+        return None
+    buttons = []
+    if page > 0:
+        buttons.append(InlineKeyboardButton("« Prev", callback_data=f"bulktrade:{token}:{page - 1}"))
+    # The page counter is a label; editing the message to the page it already shows is a BadRequest
+    buttons.append(InlineKeyboardButton(f"{page + 1}/{total}", callback_data=BULKTRADE_NOOP))
+    if page < total - 1:
+        buttons.append(InlineKeyboardButton("Next »", callback_data=f"bulktrade:{token}:{page + 1}"))
+    return InlineKeyboardMarkup([buttons])
+
 async def bulktrade(update: Update, context: CallbackContext) -> None:
-    trades = get_recent_trades()
-    if trades:
-        await update.message.reply_text("Last 24 hours Recent Bulk Trades:")
-        for trade in trades:
-            trade_type = trade.get('tradeType', 'N/A')
-            trader_username = trade.get('traderUsername', 'Unknown')
-            trade_value_usd = trade.get('tradeValueUsd', 0)
-            trade_price_usd = trade.get('tradePriceUsd', 0)
-            trade_timestamp = trade.get('tradeTimestamp', 'N/A')
-            trade_value_deso = trade.get('tradeValueDeso', 0)
-
-            # Parse the trade timestamp and make it timezone-aware
-            trade_time = datetime.fromisoformat(trade_timestamp.replace('Z', '+00:00')).astimezone(timezone.utc)
-            now = datetime.now(timezone.utc)
-            time_diff = now - trade_time
-
-            # Format the time difference
-            if time_diff.seconds >= 3600:
-                hours = time_diff.seconds // 3600
-                time_ago = f"{hours} hours ago"
-            else:
-                minutes = time_diff.seconds // 60
-                time_ago = f"{minutes} minutes ago"
-
-            message = (
-                f"Trade Type: {trade_type}\n"
-                f"Trader: {trader_username}\n"
-                f"Value (USD): ${trade_value_usd:,.2f}\n"
-                f"Price (USD): ${trade_price_usd:,.2f}\n"
-                f"Traded (DeSo): {trade_value_deso:,.2f}\n"
-                f"Timestamp: {time_ago}\n"
-                "---------------------------"
-            )
-            await update.message.reply_text(message)
+    (_, token), pages = render_bulktrade_pages()
+    if pages:
+        # One API call; further pages are fetched through the inline keyboard
+        await update.message.reply_text(pages[0].render(), reply_markup=bulktrade_keyboard(token, 0, len(pages)))
     else:
         await update.message.reply_text("No recent trades found.")
 
+async def bulktrade_page(update: Update, context: CallbackContext) -> None:
+    query = update.callback_query
+    if query.data == BULKTRADE_NOOP:
+        await query.answer()
+        return
+    _, token, page = query.data.split(":")
+    pages = upstream_cache.get(("bulktrade", token))
+    if pages is None:
+        # Rendered by another instance or expired; the page still applies if no trades arrived since
+        (_, latest), pages = render_bulktrade_pages()
+        if latest != token:
+            page = 0
+        token = latest
+    page = min(int(page), len(pages) - 1) if pages else 0
+    await query.answer()
+    if pages:
+        await query.edit_message_text(pages[page].render(), reply_markup=bulktrade_keyboard(token, page, len(pages)))
+
+async def stats(update: Update, context: CallbackContext) -> None:
+    result = trade_stats.get()
+    if result is None:
+        await update.message.reply_text("No trades in the last 24 hours.")
+    else:
+        await update.message.reply_text(result.message())
+
 async def price(update: Update, context: CallbackContext) -> None:
-    price_data = get_current_price()
+    if context.args:
+        # /price 1h and friends are answered from the in-memory candle store
+        seconds = parse_window(context.args[0])
+        series = candle_store.get()
+        if seconds is None:
+            await update.message.reply_text('Usage: /price [15m|1h|4h|12h|24h|7d]')
+        elif series is None or not len(series):
+            await update.message.reply_text("Price history is still loading, try again shortly.")
+        else:
+            await update.message.reply_text(window_message(context.args[0], series.window(seconds)))
+        return
+
+    price_data = await get_current_price()
     if price_data and isinstance(price_data, list) and len(price_data) > 0:
-        # Access the first element of the list
-        data = price_data[0]
-        
-        op = data.get('open')
-        cp = data.get('close')
-        dh = data.get('high')
-        dl = data.get('low')
-        vol = data.get('volume')
-        timestamp = data.get('timestamp')
-
-        await update.message.reply_text(
-            f"Current Price Details:\n"
-            f"Open Price: {op}\n"
-            f"Close Price: {cp}\n"
-            f"Day High: {dh}\n"
-            f"Day Low: {dl}\n"
-            f"Volume: {vol}\n"
-            f"Current Time: {timestamp}"
-        )
+        # Rendered once per candle update, however many users ask
+        await update.message.reply_text(price_message(price_data[0]))
     else:
         await update.message.reply_text("Failed to retrieve price data.")
 
 async def calculate_percentage_change(context: CallbackContext) -> None:
-    change_data = get_current_price()
-    
-    if change_data and isinstance(change_data, list) and len(change_data) > 0:
-        # Access the first element of the list
-        data = change_data[0]
-        
-        op = data.get('open')
-        cp = data.get('close')
-        print(op, cp)
-        
-        if cp > op:
-            change = ((cp - op) / op) * 100
-            message = f"🚀 $TOKEN surged by {change:.2f}% in the last 15 minutes! New LTP: {cp} DeSo."
-            if change >= 10:
-                await post_to_deso(message)  # Await the async function
-                print("Posting to DeSo")
-            await broadcast_message(context, message)  # Await the async function
-            print("Broadcasting message")
-        elif cp < op:
-            change = ((op - cp) / op) * 100
-            message = f"📉 $TOKEN dropped by {change:.2f}% in the last 15 minutes! New LTP: {cp} DeSo."
-            if change >= 10:
-                await post_to_deso(message)  # Await the async function
-                print("Posting to DeSo")
-            await broadcast_message(context, message)  # Await the async function
-            print("Broadcasting message")
-        else:
-            message = "No change in price."
-            print("No change in price")
+    # Scheduled just after each 15-minute close, so it judges the finished candle, not a forming one
+    candle = await fetch_closed_candle()
+    for _ in range(CLOSE_RETRIES):
+        if candle is not None:
+            break
+        await asyncio.sleep(CANDLE_SETTLE)
+        candle = await fetch_closed_candle()
+    if candle is None:
+        logger.error("Failed to retrieve the closed 15-minute candle.")
+        return
 
-    else:
-        logger.error("Failed to retrieve 15-minute change data.")
+    if not state.add(f"alerted:{candle.get('time')}", ttl=ALERT_DEDUPE_TTL):
+        logger.info("Candle already evaluated by another instance")
+        return
+    # warm_price has already cached the new candle's price by the time the alert sends subscribers to /price
+    await handle_price_change(context, candle)
 
-async def broadcast_message(context: CallbackContext, message: str) -> None:
-    subscribers = load_chat_ids()  # Load the list of subscribers
-    for chat_id in subscribers:
+async def warm_price(context: CallbackContext) -> None:
+    await refresh_current_price()
+
+async def handle_price_change(context, data) -> None:
+    result = evaluate_price_change(data)
+    if result is None:
+        return
+
+    message, change = result
+    if abs(change) >= POST_THRESHOLD:
+        # Queued so the broadcast does not wait for the post to commit
         try:
-            await context.bot.send_message(chat_id=chat_id, text=message)
+            post_pipeline().enqueue(message)
         except Exception as e:
-            logger.error(f"Failed to send message to {chat_id}: {e}")
+            logger.error(f"Could not queue DeSo post: {e}")
+    await broadcast_message(context, message)  # Await the async function
+
+async def consume_price_ticks(application: Application, queue) -> None:
+    # Evaluates every tick from the live feed with the same logic as the 15-minute job
+    alert_state = StreamAlertState(STREAM_ALERT_THRESHOLD)
+    while True:
+        tick = await queue.get()
+        try:
+            series = candle_store.get()
+            if series is not None and len(series):
+                series.extend([tick.candle])
+            # Every instance follows the feed, but only the leader alerts
+            if not election.leader:
+                continue
+            if series is not None and len(series):
+                await evaluate_alert_rules(application, series)
+            result = evaluate_price_change(tick.candle)
+            if result is not None and alert_state.should_alert(tick.candle, result[1]):
+                await handle_price_change(application, tick.candle)
+        except Exception as e:
+            logger.error(f"Failed to handle price tick: {e}")
+
+async def ingest_trades(context: CallbackContext) -> None:
+    added = await ingest_recent_trades(trade_store, on_trades=whale_watcher.observe)
+    if added:
+        logger.info(f"Ingested {added} new trades")
+        # Fold the new trades into /stats and lay out /bulktrade now rather than on the next command
+        trade_stats.get()
+        render_bulktrade_pages()
+
+    # Bursts from one trader within this interval arrive as a single alert
+    alerts = whale_watcher.drain()
+    chat_ids = subscribers.whale_chat_ids() if alerts else []
+    for alert in alerts:
+        result = await broadcaster.broadcast(context.bot, chat_ids, alert.message())
+        logger.info(f"Whale alert delivered: {result}")
+        if result.unreachable:
+            subscribers.remove(result.unreachable)
+
+async def broadcast_message(context: CallbackContext, message: str) -> None:
+    result = await broadcaster.broadcast(context.bot, subscribers.active_chat_ids(), message)
+    logger.info(f"Broadcast finished: {result}")
+
+    # Drop chats that blocked the bot so later broadcasts skip them
+    if result.unreachable:
+        subscribers.remove(result.unreachable)
 
 async def subscribe(update: Update, context: CallbackContext) -> None:
-    chat_id = update.message.chat_id
-    subscribers = load_chat_ids()  # Load the list of subscribers
-    
-    if chat_id not in subscribers:
-        subscribers.append(chat_id)
-        save_chat_ids(subscribers)  # Save the updated list
+    if subscribers.add(update.message.chat_id):
         await update.message.reply_text('You have subscribed to notifications.')
     else:
         await update.message.reply_text('You are already subscribed.')
 
+async def whales(update: Update, context: CallbackContext) -> None:
+    chat_id = update.message.chat_id
+    setting = context.args[0].lower() if context.args else None
+    if setting not in ("on", "off"):
+        await update.message.reply_text('Usage: /whales on|off')
+        return
+    if setting == "on":
+        subscribers.add(chat_id)
+        subscribers.set_attribute(chat_id, "whale_alerts", 1)
+        await update.message.reply_text(f'Whale alerts on: you will hear about trades of ${whale_watcher.min_value_usd:,.0f} or more.')
+    else:
+        # Turning whales off must not subscribe the chat to everything else
+        subscribers.set_attribute(chat_id, "whale_alerts", 0)
+        await update.message.reply_text('Whale alerts off.')
+
+async def change(update: Update, context: CallbackContext) -> None:
+    seconds = parse_window(context.args[0]) if context.args else None
+    if seconds is None:
+        await update.message.reply_text('Usage: /change <15m|1h|4h|12h|24h|7d>')
+        return
+    series = candle_store.get()
+    result = series.change(seconds) if series is not None else None
+    if result is None:
+        await update.message.reply_text("Price history is still loading, try again shortly.")
+        return
+    pct, summary = result
+    direction = "up" if pct >= 0 else "down"
+    await update.message.reply_text(
+        f"$TOKEN is {direction} {abs(pct):.2f}% over the last {context.args[0]}: "
+        f"{summary['open']} → {summary['close']} DeSo."
+    )
+
+async def refresh_candles(context: CallbackContext) -> None:
+    await candle_store.refresh()
+    series = candle_store.get()
+    if series is not None and len(series) and election.leader:
+        await evaluate_alert_rules(context, series)
+
+async def evaluate_alert_rules(context, series) -> None:
+    # Only rules crossed by the latest price or window changes are touched
+    rule_engine = current_rule_engine()
+    fired = rule_engine.on_price(float(series.close[series.end - 1]))
+    for window in rule_engine.windows():
+        result = series.change(window)
+        if result is not None:
+            fired += rule_engine.on_change(window, result[0])
+    if not fired:
+        return
+    rule_store.delete([rule.rule_id for rule, _ in fired])
+    result = await broadcaster.deliver(context.bot, [(rule.chat_id, rule.message(value)) for rule, value in fired])
+    logger.info(f"Delivered {len(fired)} alert rules: {result}")
+
+async def alert(update: Update, context: CallbackContext) -> None:
+    chat_id = update.message.chat_id
+    try:
+        kind, threshold, window = parse_rule(context.args, parse_window)
+    except ValueError as e:
+        await update.message.reply_text(str(e))
+        return
+    rule_engine = current_rule_engine()
+    if len(rule_engine.rules_for(chat_id)) >= MAX_RULES_PER_CHAT:
+        await update.message.reply_text(f'You already have {MAX_RULES_PER_CHAT} alerts; remove one with /unalert <id>.')
+        return
+    rule = rule_engine.add(chat_id, kind, threshold, window, rule_id=rule_store.insert(chat_id, kind, threshold, window))
+    await update.message.reply_text(f'Alert set: {rule.describe()}. It fires once.')
+
+async def list_alerts(update: Update, context: CallbackContext) -> None:
+    rules = current_rule_engine().rules_for(update.message.chat_id)
+    if not rules:
+        await update.message.reply_text('You have no alerts. Add one with /alert above 12 or /alert drop 5% 1h.')
+        return
+    await update.message.reply_text("Your alerts:\n" + "\n".join(rule.describe() for rule in rules))
+
+async def unalert(update: Update, context: CallbackContext) -> None:
+    try:
+        rule_id = int(context.args[0].lstrip('#'))
+    except (IndexError, ValueError):
+        await update.message.reply_text('Usage: /unalert <id>')
+        return
+    rule_engine = current_rule_engine()
+    rule = rule_engine.by_id.get(rule_id)
+    if rule is None or rule.chat_id != update.message.chat_id:
+        await update.message.reply_text('No such alert.')
+        return
+    rule_engine.remove(rule_id)
+    rule_store.delete([rule_id])
+    await update.message.reply_text('Alert removed.')
+
+def is_admin(update: Update) -> bool:
+    # Without a configured admin nobody may edit the watchlist
+    if not ADMIN_USERNAME:
+        return False
+    user = update.effective_user
+    return user is not None and user.username == ADMIN_USERNAME.lstrip('@')
+
+async def watch(update: Update, context: CallbackContext) -> None:
+    if not is_admin(update):
+        await update.message.reply_text('Only the bot admin can change the watchlist.')
+        return
+    if not context.args:
+        await update.message.reply_text('Usage: /watch <token public key> [label] [threshold %]')
+        return
+    public_key = context.args[0]
+    label = context.args[1] if len(context.args) > 1 else None
+    try:
+        threshold = float(context.args[2].rstrip('%')) if len(context.args) > 2 else DEFAULT_THRESHOLD
+    except ValueError:
+        await update.message.reply_text('Threshold must be a number, e.g. 5 or 5%.')
+        return
+    token = watchlist.add(public_key, label, threshold)
+    await update.message.reply_text(f'Watching ${token.label} for moves of {token.threshold:g}% or more.')
+
+async def unwatch(update: Update, context: CallbackContext) -> None:
+    if not is_admin(update):
+        await update.message.reply_text('Only the bot admin can change the watchlist.')
+        return
+    if not context.args:
+        await update.message.reply_text('Usage: /unwatch <token public key>')
+        return
+    if watchlist.remove(context.args[0]):
+        await update.message.reply_text('Removed from the watchlist.')
+    else:
+        await update.message.reply_text('That token is not on the watchlist.')
+
+async def show_watchlist(update: Update, context: CallbackContext) -> None:
+    tokens = watchlist.tokens()
+    if not tokens:
+        await update.message.reply_text('The watchlist is empty.')
+        return
+    lines = [f"${token.label} ({token.public_key}) at {token.threshold:g}%" for token in tokens]
+    for page in paginate("Watchlist:", lines):
+        await update.message.reply_text(page)
+
+async def check_watchlist(context: CallbackContext) -> None:
+    alerts, skipped = await evaluate_watchlist(watchlist.tokens())
+    if skipped:
+        logger.warning(f"Watchlist tick skipped {len(skipped)} tokens that missed the time budget")
+    for alert in alerts:
+        await broadcast_message(context, alert.message())
+
+# Long-running tasks started in stream mode
+background_tasks = []
+# Local /metrics endpoint, only started when METRICS_PORT is set
+metrics_server = None
+
+async def startup(application: Application) -> None:
+    global metrics_server
+    metrics_server = await start_metrics_server()
+    if PRICE_FEED_MODE == "stream":
+        feed = PriceFeed()
+        queue = feed.subscribe()
+        background_tasks.append(asyncio.create_task(feed.run()))
+        background_tasks.append(asyncio.create_task(consume_price_ticks(application, queue)))
+
+async def shutdown(application: Application) -> None:
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    if metrics_server is not None:
+        metrics_server.close()
+        await metrics_server.wait_closed()
+
+    submit_post = sys.modules.get("submit_post")
+    if submit_post is not None:
+        await submit_post.close_post_pipeline()
+    election.resign()
+    state.close()
+
+    # Release the pooled upstream connections
+    await close_clients()
+    trade_store.close()
+    subscribers.close()
+    watchlist.close()
+    rule_store.close()
+
 def main() -> None:
+    open_stores()
     # Create the Application and pass it your bot's token.
-    application = Application.builder().token(os.getenv("TELEGRAM_TOKEN")).build()
+    builder = Application.builder().token(os.getenv("TELEGRAM_TOKEN")).post_init(startup).post_shutdown(shutdown)
+    if BOT_MODE == "webhook":
+        from webhook import WEBHOOK_CONCURRENCY
+
+        # No getUpdates loop; webhook updates are handled concurrently up to the limit
+        builder = builder.updater(None).concurrent_updates(WEBHOOK_CONCURRENCY)
+    application = builder.build()
 
-    # Register command handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("bulktrade", bulktrade))
-    application.add_handler(CommandHandler("price", price))
-    application.add_handler(CommandHandler("subscribe", subscribe))
+    # Register command handlers; each is timed under its command name
+    commands = {
+        "start": start,
+        "bulktrade": bulktrade,
+        "stats": stats,
+        "price": price,
+        "subscribe": subscribe,
+        "change": change,
+        "whales": whales,
+        "alert": alert,
+        "alerts": list_alerts,
+        "unalert": unalert,
+        "watch": watch,
+        "unwatch": unwatch,
+        "watchlist": show_watchlist,
+    }
+    for command, handler in commands.items():
+        application.add_handler(CommandHandler(command, instrument_handler(command, handler)))
+    application.add_handler(CallbackQueryHandler(instrument_handler("bulktrade_page", bulktrade_page), pattern=r"^bulktrade:"))
 
-    # Add job to check 15-minute change every 15 minutes
+    # Leadership is claimed on the first tick and renewed well within the lease
     job_queue = application.job_queue
-    job_queue.run_repeating(calculate_percentage_change, interval=900, first=0)
+    job_queue.run_repeating(renew_leadership, interval=election.lease / 3, first=0)
+
+    # Repeating jobs start on a wall-clock boundary plus the settle delay and stay aligned to it,
+    # so every 15-minute job sees each closed candle exactly once
+    candle_aligned = seconds_until(900, CANDLE_SETTLE)
+    minute_aligned = seconds_until(60, CANDLE_SETTLE)
+
+    # Evaluate each closed 15-minute candle, after the leader has fetched the new candle's price once;
+    # in stream mode the live feed keeps the cached price current instead
+    if PRICE_FEED_MODE != "stream":
+        job_queue.run_repeating(leader_only(warm_price), interval=900, first=seconds_until(900, PRICE_WARM_DELAY))
+        job_queue.run_repeating(leader_only(calculate_percentage_change), interval=900, first=candle_aligned)
+
+    # Keep the candle window current on every instance; the first run backfills a week of history
+    job_queue.run_once(refresh_candles, when=0)
+    job_queue.run_repeating(refresh_candles, interval=60, first=minute_aligned)
+
+    # Check every watched token's closed candle on the same 15-minute cadence
+    job_queue.run_repeating(leader_only(check_watchlist), interval=900, first=candle_aligned)
+
+    # Poll for newly landed trades so /bulktrade and /stats answer from the local store and whales are pushed;
+    # followers read the trades the leader stores in the shared database
+    job_queue.run_once(leader_only(ingest_trades), when=0)
+    job_queue.run_repeating(leader_only(ingest_trades), interval=60, first=minute_aligned)
 
     # Start the Bot
-    application.run_polling()
+    if BOT_MODE == "webhook":
+        from webhook import run_webhook
+
+        asyncio.run(run_webhook(application))
+    else:
+        asyncio.run(run_polling(application))
 
 if __name__ == '__main__':
     main()
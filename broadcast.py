@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+import metrics
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows roughly 30 messages/second overall and 1 message/second per chat
+GLOBAL_RATE = 30.0
+PER_CHAT_INTERVAL = 1.0
+MAX_CONCURRENCY = 32
+MAX_ATTEMPTS = 3
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        # Flood control applies to the whole bot, so stop handing out tokens for a while
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        # Refill from the end of the pause, not from before it
+        self.updated = self.paused_until
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class BroadcastResult:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.unreachable = []
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return (f"BroadcastResult(sent={self.sent}, failed={self.failed}, retried={self.retried}, "
+                f"unreachable={len(self.unreachable)}, elapsed={self.elapsed:.2f}s)")
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    # Newer python-telegram-bot versions report retry_after as a timedelta
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class Broadcaster:
+    def __init__(self, rate: float = GLOBAL_RATE, per_chat_interval: float = PER_CHAT_INTERVAL,
+                 concurrency: int = MAX_CONCURRENCY, max_attempts: int = MAX_ATTEMPTS):
+        self.bucket = TokenBucket(rate)
+        self.per_chat_interval = per_chat_interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self._last_sent = {}  # chat_id -> monotonic time of the last message
+
+    async def _wait_for_chat(self, chat_id) -> None:
+        last = self._last_sent.get(chat_id)
+        if last is not None:
+            delay = last + self.per_chat_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    async def _send_one(self, bot, chat_id, text, result: BroadcastResult, **kwargs) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            await self._wait_for_chat(chat_id)
+            await self.bucket.acquire()
+            try:
+                await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                self._last_sent[chat_id] = time.monotonic()
+                result.sent += 1
+                return
+            except RetryAfter as e:
+                self.bucket.pause(retry_after_seconds(e))
+            except Forbidden as e:
+                # The user blocked the bot or left the chat
+                logger.info(f"Dropping unreachable chat {chat_id}: {e}")
+                result.unreachable.append(chat_id)
+                result.failed += 1
+                return
+            except BadRequest as e:
+                if "chat not found" in str(e).lower():
+                    result.unreachable.append(chat_id)
+                else:
+                    logger.error(f"Failed to send message to {chat_id}: {e}")
+                result.failed += 1
+                return
+            except (TimedOut, NetworkError) as e:
+                logger.warning(f"Transient error sending to {chat_id} (attempt {attempt}): {e}")
+            except Exception as e:
+                logger.error(f"Failed to send message to {chat_id}: {e}")
+                result.failed += 1
+                return
+            result.retried += 1
+        result.failed += 1
+
+    async def broadcast(self, bot, chat_ids, text, **kwargs) -> BroadcastResult:
+        return await self.deliver(bot, ((chat_id, text) for chat_id in chat_ids), **kwargs)
+
+    async def deliver(self, bot, messages, **kwargs) -> BroadcastResult:
+        # Sends individual (chat_id, text) pairs under the same limits as a broadcast
+        result = BroadcastResult()
+        start = time.perf_counter()
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+
+        # A fixed pool of workers keeps memory flat regardless of subscriber count
+        async def worker():
+            while True:
+                try:
+                    chat_id, text = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._send_one(bot, chat_id, text, result, **kwargs)
+
+        workers = min(self.concurrency, queue.qsize()) or 1
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        result.elapsed = time.perf_counter() - start
+        metrics.broadcast_duration.observe(result.elapsed)
+        metrics.broadcast_messages.inc("sent", amount=result.sent)
+        metrics.broadcast_messages.inc("failed", amount=result.failed)
+        metrics.broadcast_messages.inc("retried", amount=result.retried)
+        return result
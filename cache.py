@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import OrderedDict
+from metrics import Gauge
+
+# Seconds per candle resolution used by the focus.xyz history API
+RESOLUTION_SECONDS = {
+    "1M": 60,
+    "5M": 300,
+    "15M": 900,
+    "1H": 3600,
+    "4H": 14400,
+    "1D": 86400,
+}
+
+
+def candle_ttl(resolution: str, max_ttl: float, now: float = None) -> float:
+    # Cache until the current candle closes, but never longer than max_ttl
+    now = time.time() if now is None else now
+    period = RESOLUTION_SECONDS[resolution]
+    return max(0.0, min(period - now % period, max_ttl))
+
+
+def seconds_until(period: float, offset: float = 0.0, now: float = None) -> float:
+    # Seconds to the next multiple of period (in epoch time) plus offset; as a repeating job's
+    # first delay it keeps every run aligned to candle boundaries
+    now = time.time() if now is None else now
+    return (offset - now) % period
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 256, default_ttl: float = 30.0):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight = {}  # key -> asyncio.Future shared by concurrent misses
+        self._last_good = OrderedDict()  # key -> last value stored, kept past expiry for outages
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.stale_served = 0
+        self.refreshes = 0
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        self._last_good[key] = value
+        self._last_good.move_to_end(key)
+        while len(self._last_good) > self.max_size:
+            self._last_good.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key, fetch, ttl: float = None):
+        # fetch is a zero-argument coroutine function; None results are not cached.
+        # When fetch fails or returns None, the last good value is served if there is one.
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            try:
+                value = await fetch()
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if key not in self._last_good:
+                    future.set_exception(e)
+                    # Mark the exception as retrieved when nobody else was waiting
+                    future.exception()
+                    raise
+                value = None
+            if value is None:
+                value = self._last_good.get(key)
+                if value is not None:
+                    self.stale_served += 1
+            else:
+                self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    async def refresh(self, key, fetch, ttl: float = None):
+        # Refetches ahead of expiry; readers keep the current entry until the new value lands
+        if key in self._in_flight:
+            return await asyncio.shield(self._in_flight[key])
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            try:
+                value = await fetch()
+            except Exception:
+                value = None
+            if value is not None:
+                self.set(key, value, ttl)
+                self.refreshes += 1
+            else:
+                # Requests that joined this refresh fall back like a failed get_or_fetch
+                value = self._last_good.get(key)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "stale_served": self.stale_served,
+            "refreshes": self.refreshes,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+# Shared cache in front of the price and trade fetchers, sized for a few hundred watched tokens
+upstream_cache = TTLCache(max_size=1024)
+
+for _stat in ("hits", "misses", "coalesced", "stale_served", "hit_rate"):
+    Gauge(f"upstream_cache_{_stat}", f"Shared upstream cache {_stat.replace('_', ' ')}",
+          lambda stat=_stat: upstream_cache.stats()[stat])
@@ -0,0 +1,134 @@
+import logging
+import numpy as np
+from cache import RESOLUTION_SECONDS
+from history_get import TOKEN_SYMBOL, fetch_candles
+
+logger = logging.getLogger(__name__)
+
+BASE_RESOLUTION = "15M"
+# One week of 15-minute candles
+CAPACITY = 672
+BACKFILL_COUNT = CAPACITY
+# Refreshes re-read the forming candle and the one that just closed
+REFRESH_COUNT = 2
+
+# Aliases accepted by /price and /change
+WINDOW_ALIASES = {
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "4h": 14400,
+    "12h": 43200,
+    "24h": 86400,
+    "1d": 86400,
+    "7d": 604800,
+}
+
+
+class CandleSeries:
+    # Columnar rolling window of candles, oldest first; time is in milliseconds
+    def __init__(self, resolution: str = BASE_RESOLUTION, capacity: int = CAPACITY):
+        self.resolution = resolution
+        self.period_ms = RESOLUTION_SECONDS[resolution] * 1000
+        self.capacity = capacity
+        # Twice the capacity so appends only compact occasionally
+        self.time = np.zeros(2 * capacity, dtype=np.int64)
+        self.open = np.zeros(2 * capacity)
+        self.high = np.zeros(2 * capacity)
+        self.low = np.zeros(2 * capacity)
+        self.close = np.zeros(2 * capacity)
+        self.volume = np.zeros(2 * capacity)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def _columns(self):
+        return (self.time, self.open, self.high, self.low, self.close, self.volume)
+
+    def _compact(self) -> None:
+        keep = min(len(self), self.capacity)
+        first = self.end - keep
+        for column in self._columns():
+            column[:keep] = column[first:self.end]
+        self.start, self.end = 0, keep
+
+    def extend(self, candles) -> int:
+        # Upserts candles from the history API; returns how many new periods were appended
+        appended = 0
+        for candle in sorted(candles, key=lambda c: int(c['time'])):
+            t = int(candle['time'])
+            row = (t, candle['open'], candle['high'], candle['low'], candle['close'], candle.get('volume') or 0)
+            if len(self) and t == self.time[self.end - 1]:
+                # The forming candle was updated
+                index = self.end - 1
+            elif len(self) and t < self.time[self.end - 1]:
+                continue
+            else:
+                if self.end == len(self.time):
+                    self._compact()
+                index = self.end
+                self.end += 1
+                appended += 1
+            for column, value in zip(self._columns(), row):
+                column[index] = value
+        if len(self) > self.capacity:
+            self.start = self.end - self.capacity
+        return appended
+
+    def view(self):
+        s = slice(self.start, self.end)
+        return self.time[s], self.open[s], self.high[s], self.low[s], self.close[s], self.volume[s]
+
+    def window(self, seconds: int):
+        # OHLCV over the trailing window ending with the latest candle
+        time, open_, high, low, close, volume = self.view()
+        if not len(time):
+            return None
+        cutoff = time[-1] + self.period_ms - seconds * 1000
+        first = int(np.searchsorted(time, cutoff))
+        if first >= len(time):
+            first = len(time) - 1
+        return {
+            "time": int(time[first]),
+            "open": float(open_[first]),
+            "high": float(high[first:].max()),
+            "low": float(low[first:].min()),
+            "close": float(close[-1]),
+            "volume": float(volume[first:].sum()),
+            "complete": bool(time[0] <= cutoff),
+        }
+
+    def change(self, seconds: int):
+        # Percentage change from the window's first open to the latest close
+        summary = self.window(seconds)
+        if summary is None or not summary["open"]:
+            return None
+        return (summary["close"] - summary["open"]) / summary["open"] * 100, summary
+
+
+class CandleStore:
+    def __init__(self, resolution: str = BASE_RESOLUTION, capacity: int = CAPACITY):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.series = {}
+
+    def get(self, symbol: str = TOKEN_SYMBOL):
+        return self.series.get(symbol)
+
+    async def refresh(self, symbol: str = TOKEN_SYMBOL) -> int:
+        # The first call backfills the whole window; later calls only fetch the newest candles
+        series = self.series.get(symbol)
+        count = REFRESH_COUNT if series is not None and len(series) else BACKFILL_COUNT
+        candles = await fetch_candles(symbol, resolution=self.resolution, countback=count)
+        if not candles:
+            logger.error(f"Failed to refresh candles for {symbol}")
+            return 0
+        if series is None:
+            series = self.series[symbol] = CandleSeries(self.resolution, self.capacity)
+        return series.extend(candles)
+
+
+def parse_window(text: str):
+    return WINDOW_ALIASES.get(text.lower()) if text else None
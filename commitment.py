@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+from upstream import hedged_request
+
+logger = logging.getLogger(__name__)
+
+INITIAL_POLL_DELAY = 0.1
+MAX_POLL_DELAY = 2.0
+MAX_CONCURRENT_LOOKUPS = 16
+
+
+class PendingTxn:
+    def __init__(self, txn_hash_hex: str, future: asyncio.Future, deadline: float, delay: float):
+        self.txn_hash_hex = txn_hash_hex
+        self.future = future
+        self.deadline = deadline
+        self.delay = delay
+        self.next_poll = time.monotonic() + delay
+
+
+class CommitmentTracker:
+    def __init__(self, node_url: str, initial_delay: float = INITIAL_POLL_DELAY,
+                 max_delay: float = MAX_POLL_DELAY, concurrency: int = MAX_CONCURRENT_LOOKUPS,
+                 secondary_node_url: str = None):
+        self.node_url = node_url.rstrip("/")
+        # Lookups are hedged to this node when the primary is slow to answer
+        self.secondary_node_url = secondary_node_url.rstrip("/") if secondary_node_url else None
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.concurrency = concurrency
+        self.lookups = 0
+        self._pending = {}  # txn hash -> PendingTxn
+        self._wakeup = None
+        self._task = None
+
+    def watch(self, txn_hash_hex: str, timeout_seconds: float) -> asyncio.Future:
+        # Returns a future that resolves on commit or raises TimeoutError
+        pending = self._pending.get(txn_hash_hex)
+        if pending is not None:
+            return pending.future
+        loop = asyncio.get_running_loop()
+        pending = PendingTxn(txn_hash_hex, loop.create_future(), time.monotonic() + timeout_seconds, self.initial_delay)
+        self._pending[txn_hash_hex] = pending
+
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        else:
+            self._wakeup.set()
+        return pending.future
+
+    async def wait(self, txn_hash_hex: str, timeout_seconds: float) -> None:
+        await asyncio.shield(self.watch(txn_hash_hex, timeout_seconds))
+
+    async def _is_committed(self, txn_hash_hex: str) -> bool:
+        self.lookups += 1
+        node_urls = [self.node_url] + ([self.secondary_node_url] if self.secondary_node_url else [])
+        response = await hedged_request(
+            "POST",
+            [f"{node_url}/api/v0/get-txn" for node_url in node_urls],
+            json={"TxnHashHex": txn_hash_hex, "TxnStatus": "Committed"},
+            headers={"Origin": self.node_url},
+            # The polling loop already retries on its own schedule
+            retries=0,
+        )
+        response.raise_for_status()
+        return response.json().get("TxnFound", False)
+
+    async def _poll(self, pending: PendingTxn, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            try:
+                committed = await self._is_committed(pending.txn_hash_hex)
+            except Exception as e:
+                # Transient node errors just push the next lookup back
+                logger.warning(f"Error getting txn {pending.txn_hash_hex} from node: {e}")
+                committed = False
+
+        if committed:
+            self._resolve(pending)
+        else:
+            pending.delay = min(pending.delay * 2, self.max_delay)
+            pending.next_poll = time.monotonic() + pending.delay
+
+    def _resolve(self, pending: PendingTxn, error: Exception = None) -> None:
+        self._pending.pop(pending.txn_hash_hex, None)
+        if pending.future.done():
+            return
+        if error is None:
+            pending.future.set_result(pending.txn_hash_hex)
+        else:
+            pending.future.set_exception(error)
+
+    async def _run(self) -> None:
+        # One loop serves every pending transaction; it exits when nothing is left to watch
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while self._pending:
+            now = time.monotonic()
+            for pending in list(self._pending.values()):
+                if now >= pending.deadline:
+                    self._resolve(pending, TimeoutError(f"Timeout waiting for txn to confirm: {pending.txn_hash_hex}"))
+
+            due = [pending for pending in self._pending.values() if pending.next_poll <= now]
+            if due:
+                await asyncio.gather(*(self._poll(pending, semaphore) for pending in due))
+                continue
+            if not self._pending:
+                break
+
+            next_wake = min(min(p.next_poll, p.deadline) for p in self._pending.values())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_wake - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
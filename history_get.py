@@ -1,30 +1,74 @@
-import requests
+import logging
+import os
 import time
+from upstream import UpstreamError, request
+from cache import RESOLUTION_SECONDS, upstream_cache, candle_ttl
 
-def get_current_price():
+logger = logging.getLogger(__name__)
+
+# Base URL can be pointed at a local mock server for benchmarks
+FOCUS_API_URL = os.getenv("FOCUS_API_URL", "https://focus.xyz")
+
+# Token tracked by default and the DeSo quote it is priced in
+TOKEN_SYMBOL = "BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ"
+QUOTE_SYMBOL = "BC1YLiwTN3DbkU8VmD7F7wXcRR1tFX6jDEkLyruHD2WsH3URomimxLX"
+
+# Longest time a price can be served from cache inside one candle
+PRICE_MAX_TTL = 30.0
+
+async def get_current_price(symbol=TOKEN_SYMBOL):
+    # Served from the shared cache; concurrent misses share one request
+    return await upstream_cache.get_or_fetch(
+        ("price", symbol, "15M"), lambda: fetch_current_price(symbol), ttl=candle_ttl("15M", PRICE_MAX_TTL)
+    )
+
+async def refresh_current_price(symbol=TOKEN_SYMBOL):
+    # Prefetch for get_current_price, so /price is answered from cache
+    return await upstream_cache.refresh(
+        ("price", symbol, "15M"), lambda: fetch_current_price(symbol), ttl=candle_ttl("15M", PRICE_MAX_TTL)
+    )
+
+async def fetch_closed_candle(symbol=TOKEN_SYMBOL, resolution="15M", now=None):
+    # The candle that closed most recently, or None if the API has not published it yet
+    period_ms = RESOLUTION_SECONDS[resolution] * 1000
+    now_ms = int((time.time() if now is None else now) * 1000)
+    closed_at = now_ms - now_ms % period_ms - period_ms
+    for candle in await fetch_candles(symbol, resolution=resolution, countback=2) or []:
+        if int(candle['time']) == closed_at:
+            return candle
+    return None
+
+async def fetch_current_price(symbol=TOKEN_SYMBOL):
+    return await fetch_candles(symbol, resolution="15M", countback=1)
+
+async def fetch_candles(symbol=TOKEN_SYMBOL, resolution="15M", countback=1, quote_symbol=QUOTE_SYMBOL):
     # Define the base URL
-    url = "https://focus.xyz/api/v0/tokens/candlesticks/history"
+    url = f"{FOCUS_API_URL}/api/v0/tokens/candlesticks/history"
 
     # Get the current Unix timestamp in milliseconds
     current_time = int(time.time() * 1000)
 
     # Define query parameters
     params = {
-        "symbol": "BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ",
+        "symbol": symbol,
         "to": current_time,
-        "resolution": "15M",
-        "countback": 1,
-        "quoteSymbol": "BC1YLiwTN3DbkU8VmD7F7wXcRR1tFX6jDEkLyruHD2WsH3URomimxLX"
+        "resolution": resolution,
+        "countback": countback,
+        "quoteSymbol": quote_symbol
     }
 
-    # Make the GET request
-    response = requests.get(url, params=params)
+    # GET on the shared pooled client, retried with backoff and guarded by the focus.xyz breaker
+    try:
+        response = await request("GET", url, params=params)
+    except UpstreamError as e:
+        logger.warning(f"Candle fetch failed: {e}")
+        return None
 
     # Check if the request was successful
     if response.status_code == 200:
         data = response.json()
         # Assuming the data is a list of dictionaries
-        print(data)
+        logger.debug(f"Fetched candles: {data}")
         return data
     else:
         return None
@@ -0,0 +1,73 @@
+import asyncio
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pool sizing shared by every upstream call the bot makes
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+# (connect, read) for the blocking session, which has no timeout of its own
+SYNC_TIMEOUT = (5.0, 15.0)
+# Only reads are retried by the blocking session; transaction submits must not be repeated blindly
+SYNC_RETRY = Retry(
+    total=2,
+    backoff_factor=0.2,
+    backoff_jitter=0.2,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset(("GET", "HEAD", "OPTIONS")),
+    raise_on_status=False,
+)
+
+_async_client = None
+_async_client_loop = None
+_sync_session = None
+
+
+def get_async_client() -> httpx.AsyncClient:
+    # One pooled keep-alive client per event loop, created on first use
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+        _async_client_loop = loop
+    return _async_client
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=SYNC_TIMEOUT if timeout is None else timeout, **kwargs)
+
+
+def get_sync_session() -> requests.Session:
+    # Pooled session for the blocking DeSo node calls, which run in worker threads
+    global _sync_session
+    if _sync_session is None:
+        session = requests.Session()
+        adapter = TimeoutHTTPAdapter(
+            pool_connections=MAX_KEEPALIVE_CONNECTIONS, pool_maxsize=MAX_CONNECTIONS, max_retries=SYNC_RETRY
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _sync_session = session
+    return _sync_session
+
+
+async def close_clients() -> None:
+    global _async_client, _async_client_loop, _sync_session
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+        _async_client_loop = None
+    if _sync_session is not None:
+        _sync_session.close()
+        _sync_session = None
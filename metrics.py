@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Set METRICS_PORT to serve /metrics; without it nothing is recorded
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("METRICS_PORT")
+# Seconds; covers cache hits through slow commitment waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+enabled = False
+_registry = []
+
+
+def format_labels(labelnames, values) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # label values -> total
+        _registry.append(self)
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        if enabled:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge:
+    # Read through a callback at scrape time, so the hot path pays nothing
+    def __init__(self, name: str, help: str, read):
+        self.name = name
+        self.help = help
+        self.read = read
+        _registry.append(self)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.read()}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, value: float, *labels) -> None:
+        if not enabled:
+            return
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = format_labels(self.labelnames + ("le",), labels + (bound,))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            base = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{base} {series[-1]}"
+            yield f"{self.name}_count{base} {cumulative}"
+
+
+def instrument_handler(command: str, handler):
+    # Wraps a Telegram callback so its latency and failures are recorded under the command name
+    async def wrapper(update, context):
+        start = time.perf_counter()
+        try:
+            return await handler(update, context)
+        except Exception:
+            handler_errors.inc(command)
+            raise
+        finally:
+            handler_latency.observe(time.perf_counter() - start, command)
+    return wrapper
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await reader.readline()
+        # Drain the headers; the body of a scrape request is always empty
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", render().encode()
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port=METRICS_PORT):
+    # Turns recording on and serves the text exposition format; returns None when disabled
+    global enabled
+    if port in (None, ""):
+        return None
+    enabled = True
+    server = await asyncio.start_server(_handle, host, int(port))
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
+
+
+# Shared instruments; modules record into these rather than defining their own
+upstream_latency = Histogram(
+    "upstream_request_seconds", "Upstream HTTP request latency per attempt", ("host", "endpoint", "outcome")
+)
+handler_latency = Histogram("handler_seconds", "Telegram command handler latency", ("command",))
+handler_errors = Counter("handler_errors_total", "Command handlers that raised", ("command",))
+broadcast_duration = Histogram("broadcast_seconds", "Time to fan one message list out to every chat")
+broadcast_messages = Counter("broadcast_messages_total", "Broadcast deliveries by outcome", ("outcome",))
+txn_submit_latency = Histogram("txn_submit_seconds", "Construct, sign and submit time for a DeSo post")
+txn_commit_latency = Histogram("txn_commit_seconds", "Time from submission until the node reports the txn committed")
+posts_total = Counter("deso_posts_total", "DeSo posts by outcome", ("outcome",))
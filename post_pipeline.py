@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import time
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Messages arriving within this many seconds of the first one share a batch
+COALESCE_WINDOW = float(os.getenv("POST_COALESCE_WINDOW", "1.0"))
+MAX_BATCH = 8
+# Batches that may be constructing, submitting or waiting for commitment at once
+MAX_IN_FLIGHT = 4
+COMMIT_TIMEOUT = 30.0
+# Wrap a multi-post batch into one atomic transaction instead of submitting each post
+USE_ATOMIC = os.getenv("POST_ATOMIC", "1") == "1"
+
+
+class PostPipeline:
+    def __init__(self, client, public_key: str, tracker, coalesce_window: float = COALESCE_WINDOW,
+                 max_batch: int = MAX_BATCH, max_in_flight: int = MAX_IN_FLIGHT, atomic: bool = USE_ATOMIC,
+                 commit_timeout: float = COMMIT_TIMEOUT):
+        self.client = client
+        self.public_key = public_key
+        self.tracker = tracker
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self.atomic = atomic
+        self.commit_timeout = commit_timeout
+        self.posts = 0
+        self.transactions = 0
+        self.fee_nanos = 0
+        self._queue = None
+        self._slots = None
+        self._task = None
+        self._batches = set()
+        self._max_in_flight = max_in_flight
+
+    def enqueue(self, message: str) -> asyncio.Future:
+        # Returns a future resolving to the committed txn hash carrying this message
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((message, future))
+        return future
+
+    async def close(self) -> None:
+        tasks = [task for task in (self._task, *self._batches) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.coalesce_window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            # The next batch is gathered while this one is still in the node round trips
+            await self._slots.acquire()
+            task = asyncio.create_task(self._post_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task) -> None:
+        self._batches.discard(task)
+        self._slots.release()
+
+    def _construct(self, message: str):
+        return self.client.submit_post(
+            updater_public_key_base58check=self.public_key,
+            body=message,
+            post_extra_data={"Node": "1"},
+            min_fee_rate_nanos_per_kb=1000,
+        )
+
+    async def _post_batch(self, batch) -> None:
+        messages = [message for message, _ in batch]
+        futures = [future for _, future in batch]
+        start = time.perf_counter()
+        try:
+            constructed = await asyncio.gather(*(asyncio.to_thread(self._construct, m) for m in messages))
+            fee = sum(c.get("FeeNanos", 0) for c in constructed)
+            wrapper = None
+            if self.atomic and len(constructed) > 1:
+                try:
+                    wrapper = await asyncio.to_thread(
+                        self.client.create_atomic_txns_wrapper, [c["TransactionHex"] for c in constructed]
+                    )
+                except Exception as e:
+                    # The constructed posts are still valid on their own; submit them one by one instead
+                    logger.warning(f"Wrapping {len(batch)} posts atomically failed, submitting them singly: {e}")
+            if wrapper is not None:
+                # sign_and_submit_txn signs every inner txn and submits the wrapper atomically
+                fee += wrapper.get("FeeNanos", 0)
+                submitted = [await asyncio.to_thread(self.client.sign_and_submit_txn, wrapper)]
+                hashes = [submitted[0]["TxnHashHex"]] * len(batch)
+            else:
+                submitted = await asyncio.gather(
+                    *(asyncio.to_thread(self.client.sign_and_submit_txn, c) for c in constructed)
+                )
+                hashes = [s["TxnHashHex"] for s in submitted]
+            submitted_at = time.perf_counter()
+            metrics.txn_submit_latency.observe(submitted_at - start)
+            await asyncio.gather(*(self.tracker.wait(h, self.commit_timeout) for h in set(hashes)))
+            metrics.txn_commit_latency.observe(time.perf_counter() - submitted_at)
+        except Exception as e:
+            logger.error(f"Posting {len(batch)} messages to DeSo failed: {e}")
+            metrics.posts_total.inc("failed", amount=len(batch))
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+                    # Callers may fire and forget; the failure is already logged
+                    future.exception()
+            return
+
+        self.posts += len(batch)
+        self.transactions += len(submitted)
+        self.fee_nanos += fee
+        metrics.posts_total.inc("committed", amount=len(batch))
+        logger.info(f"Committed {len(batch)} posts in {len(submitted)} transactions")
+        for future, txn_hash in zip(futures, hashes):
+            if not future.done():
+                future.set_result(txn_hash)
+
+    def stats(self) -> dict:
+        return {
+            "posts": self.posts,
+            "transactions": self.transactions,
+            "fee_nanos_per_post": self.fee_nanos / self.posts if self.posts else 0.0,
+        }
@@ -0,0 +1,18 @@
+# Moves at or beyond this percentage are also posted to DeSo
+POST_THRESHOLD = 10
+
+
+def evaluate_price_change(candle):
+    # Returns (message, change %) for a moved candle, or None when the price is flat
+    op = candle.get('open')
+    cp = candle.get('close')
+
+    if cp > op:
+        change = ((cp - op) / op) * 100
+        message = f"🚀 $TOKEN surged by {change:.2f}% in the last 15 minutes! New LTP: {cp} DeSo."
+        return message, change
+    elif cp < op:
+        change = ((op - cp) / op) * 100
+        message = f"📉 $TOKEN dropped by {change:.2f}% in the last 15 minutes! New LTP: {cp} DeSo."
+        return message, -change
+    return None
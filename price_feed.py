@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from cache import candle_ttl, upstream_cache
+from history_get import FOCUS_API_URL, QUOTE_SYMBOL, TOKEN_SYMBOL, PRICE_MAX_TTL
+from http_client import get_async_client
+from upstream import request
+
+logger = logging.getLogger(__name__)
+
+# Server-sent events endpoint, when the upstream offers one; otherwise the feed polls
+PRICE_STREAM_URL = os.getenv("PRICE_STREAM_URL")
+MIN_POLL_INTERVAL = 5.0
+MAX_POLL_INTERVAL = 60.0
+# Each unchanged response stretches the polling interval by this factor
+POLL_BACKOFF = 1.5
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class PriceTick:
+    __slots__ = ("symbol", "candle", "received_at")
+
+    def __init__(self, symbol: str, candle: dict, received_at: float):
+        self.symbol = symbol
+        self.candle = candle
+        self.received_at = received_at
+
+
+class PriceFeed:
+    def __init__(self, symbol: str = TOKEN_SYMBOL, stream_url: str = PRICE_STREAM_URL,
+                 min_interval: float = MIN_POLL_INTERVAL, max_interval: float = MAX_POLL_INTERVAL):
+        self.symbol = symbol
+        self.stream_url = stream_url
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.requests = 0
+        self.not_modified = 0
+        self._etag = None
+        self._last = None
+        self._queues = []
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._queues.append(queue)
+        return queue
+
+    def publish(self, candle: dict) -> None:
+        # Only changed candles become ticks; slow consumers lose their oldest tick
+        key = (candle.get('time'), candle.get('close'), candle.get('high'), candle.get('low'))
+        if key == self._last:
+            return
+        self._last = key
+        # Keep /price warm with whatever the feed saw last
+        upstream_cache.set(("price", self.symbol, "15M"), [candle], ttl=candle_ttl("15M", PRICE_MAX_TTL))
+        tick = PriceTick(self.symbol, candle, time.time())
+        for queue in self._queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(tick)
+
+    async def run(self) -> None:
+        if self.stream_url:
+            await self._run_stream()
+        else:
+            await self._run_polling()
+
+    async def _poll_once(self) -> bool:
+        # Conditional GET; returns True when the candle changed
+        params = {
+            "symbol": self.symbol,
+            "to": int(time.time() * 1000),
+            "resolution": "15M",
+            "countback": 1,
+            "quoteSymbol": QUOTE_SYMBOL,
+        }
+        headers = {"If-None-Match": self._etag} if self._etag else {}
+        self.requests += 1
+        response = await request(
+            "GET", f"{FOCUS_API_URL}/api/v0/tokens/candlesticks/history", params=params, headers=headers
+        )
+        if response.status_code == 304:
+            self.not_modified += 1
+            return False
+        response.raise_for_status()
+        self._etag = response.headers.get("ETag")
+        data = response.json()
+        if not data:
+            return False
+        before = self._last
+        self.publish(data[-1])
+        return self._last != before
+
+    async def _run_polling(self) -> None:
+        # Poll fast while the price moves and back off while it is flat
+        while True:
+            try:
+                changed = await self._poll_once()
+            except Exception as e:
+                logger.warning(f"Price poll failed: {e}")
+                changed = False
+            if changed:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * POLL_BACKOFF, self.max_interval)
+            await asyncio.sleep(self.interval)
+
+    async def _run_stream(self) -> None:
+        # Consume "data: {candle json}" events, reconnecting with backoff
+        delay = 1.0
+        while True:
+            try:
+                self.requests += 1
+                async with get_async_client().stream(
+                    "GET", self.stream_url, params={"symbol": self.symbol}, timeout=None
+                ) as response:
+                    response.raise_for_status()
+                    delay = 1.0
+                    async for line in response.aiter_lines():
+                        if line.startswith("data:"):
+                            self.publish(json.loads(line[5:]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Price stream disconnected: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_interval)
+
+
+class StreamAlertState:
+    # Fires at most one alert per candle so a volatile candle does not spam subscribers
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._alerted_candle = None
+
+    def should_alert(self, candle: dict, change: float) -> bool:
+        if abs(change) < self.threshold or candle.get('time') == self._alerted_candle:
+            return False
+        self._alerted_candle = candle.get('time')
+        return True
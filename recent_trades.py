@@ -1,108 +1,77 @@
-import requests
-from datetime import datetime, timedelta
+import hashlib
+import logging
+import os
+from upstream import UpstreamError, request
 
-def get_recent_trades():
-    # Define the GraphQL endpoint
-    url = "https://graphql.focus.xyz/graphql"
+logger = logging.getLogger(__name__)
 
-    # Calculate the timestamp for 24 hours ago
-    twenty_four_hours_ago = datetime.utcnow() - timedelta(days=1)
-    twenty_four_hours_ago_iso = twenty_four_hours_ago.isoformat()
+# Endpoint can be pointed at a local mock server for benchmarks
+FOCUS_GRAPHQL_URL = os.getenv("FOCUS_GRAPHQL_URL", "https://graphql.focus.xyz/graphql")
 
-    # GraphQL query
-    query = """
-    query TradingRecentTrades($first: Int, $orderBy: [TradingRecentTradesOrderBy!], $filter: TradingRecentTradeFilter, $offset: Int) {
-      tradingRecentTrades(first: $first, orderBy: $orderBy, filter: $filter, offset: $offset) {
-        nodes {
-          denominatedCoinPublicKey
-          tradeTimestamp
-          tradeType
-          traderPublicKey
-          traderUsername
-          traderDisplayName
-          traderProfilePicUrl
-          tokenPublicKey
-          tokenUsername
-          tokenProfilePicUrl
-          tokenCategory
-          tradeValueUsd
-          tradeValueFocus
-          tradeValueDeso
-          tradePriceUsd
-          tradePriceFocus
-          tradePriceDeso
-          tokenMarketCapUsd
-          tokenMarketCapFocus
-          txnHashHex
-          tradeBuyCoinPublicKey
-          tradeSellCoinPublicKey
-          tradeBuyQuantity
-          tradeSellQuantity
-          __typename
-        }
-        pageInfo {
-          hasNextPage
-          hasPreviousPage
-          startCursor
-          endCursor
-          __typename
-        }
-        totalCount
-        __typename
-      }
-    }
-    """
-
-    # Initialize variables
-    trades = []
-    offset = 0
-    first = 5  # Number of trades to fetch per request
+# Token whose large trades are reported by /bulktrade
+TOKEN_PUBLIC_KEY = "BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ"
 
-    while len(trades) < 24:
-        # GraphQL variables
-        variables = {
-            "first": first,
-            "orderBy": ["TRADE_TIMESTAMP_DESC"],
-            "filter": {
-                "isMatchedOrder": {"equalTo": False},
-                "tradeValueUsd": {"greaterThanOrEqualTo": 10000},
-                "tokenPublicKey": {"equalTo": "BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ"},
-                "tradeTimestamp": {"greaterThanOrEqualTo": twenty_four_hours_ago_iso}
-            },
-            "offset": offset
-        }
+# Send only the query hash once the server has seen the document (Apollo-style persisted queries)
+USE_PERSISTED_QUERIES = os.getenv("FOCUS_PERSISTED_QUERIES", "0") == "1"
 
-        # Request payload
-        payload = {
-            "query": query,
-            "variables": variables
-        }
+# Only the fields bulktrade renders, /stats aggregates or dedupe uses are selected
+TRADES_QUERY = """
+query TradingRecentTrades($first: Int, $after: Cursor, $orderBy: [TradingRecentTradesOrderBy!], $filter: TradingRecentTradeFilter) {
+  tradingRecentTrades(first: $first, after: $after, orderBy: $orderBy, filter: $filter) {
+    nodes {
+      tradeTimestamp
+      tradeType
+      traderUsername
+      traderPublicKey
+      tradeValueUsd
+      tradeValueDeso
+      tradePriceUsd
+      txnHashHex
+    }
+    pageInfo {
+      hasNextPage
+      endCursor
+    }
+  }
+}
+"""
 
-        # Headers
-        headers = {
-            "Content-Type": "application/json"
-        }
+def compile_query(query):
+    # Precompile a document once: collapse whitespace and hash it for persisted lookups
+    document = " ".join(query.split())
+    return document, hashlib.sha256(document.encode("utf-8")).hexdigest()
 
-        # Make the POST request
-        response = requests.post(url, json=payload, headers=headers)
+TRADES_QUERY_DOCUMENT, TRADES_QUERY_HASH = compile_query(TRADES_QUERY)
 
-        # Check if request was successful
-        if response.status_code == 200:
-            data = response.json()
-            new_trades = data['data']['tradingRecentTrades']['nodes']
-            trades.extend(new_trades)
+async def post_graphql(document, query_hash, variables, operation_name="TradingRecentTrades", persisted=USE_PERSISTED_QUERIES):
+    try:
+        return await _post_graphql(document, query_hash, variables, operation_name, persisted)
+    except UpstreamError as e:
+        logger.warning(f"GraphQL request failed: {e}")
+        return None
 
-            # Check if there are more trades to fetch
-            if not data['data']['tradingRecentTrades']['pageInfo']['hasNextPage']:
-                break
+async def _post_graphql(document, query_hash, variables, operation_name, persisted):
+    # Queries only read, so they are retried like GETs
+    payload = {"operationName": operation_name, "variables": variables}
+    if persisted:
+        payload["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+    else:
+        payload["query"] = document
 
-            # Increment offset for the next batch
-            offset += first
-        else:
-            break
+    response = await request("POST", FOCUS_GRAPHQL_URL, idempotent=True, json=payload)
+    if response.status_code != 200:
+        return None
+    data = response.json()
 
-    # Return only the first 24 trades
-    return trades[:24]
+    # Register the document on first use, then the hash alone is enough
+    errors = data.get("errors") or []
+    if persisted and any("PersistedQueryNotFound" in str(e.get("message")) for e in errors):
+        payload["query"] = document
+        response = await request("POST", FOCUS_GRAPHQL_URL, idempotent=True, json=payload)
+        if response.status_code != 200:
+            return None
+        data = response.json()
+    return data
 
 # Data is like below so give upto 5 data like this as response
 # {'data': {'tradingRecentTrades': {'nodes': [{'denominatedCoinPublicKey': 'BC1YLiwTN3DbkU8VmD7F7wXcRR1tFX6jDEkLyruHD2WsH3URomimxLX', 'tradeTimestamp': '2025-02-12T03:21:40.610084', 'tradeType': 'BUY', 'traderPublicKey': 'BC1YLg5xgL7PAToY7dNrxqRmtAarJvBBZKJTkreuv2eLvCppf58Pwn9', 'traderUsername': 'Doodles', 'traderDisplayName': 'Doodles', 'traderProfilePicUrl': '', 'tokenPublicKey': 'BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ', 'tokenUsername': 'DESO', 'tokenProfilePicUrl': 'https://node.deso.org/assets/deso/coin-deso.png', 'tokenCategory': '', 'tradeValueUsd': 26247.97656737173, 'tradeValueFocus': 36304807.63520846, 'tradeValueDeso': 2235.7731318033843, 'tradePriceUsd': 11.649012820480072, 'tradePriceFocus': 16112.296066026, 'tradePriceDeso': 0.9922498143509431, 'tokenMarketCapUsd': 131350325.08959344, 'tokenMarketCapFocus': 181676796036.44513, 'txnHashHex': '0391e212f692cd8ba12898ddded56d36db9f689fc822bbca9526cd97c6bc99d9', 'tradeBuyCoinPublicKey': 'BC1YLbnP7rndL92x7DbLp6bkUpCgKmgoHgz7xEbwhgHTps3ZrXA6LtQ', 'tradeSellCoinPublicKey': 'BC1YLiwTN3DbkU8VmD7F7wXcRR1tFX6jDEkLyruHD2WsH3URomimxLX', 'tradeBuyQuantity': 2253.236130123, 'tradeSellQuantity': 26254.407383374553, '__typename': 'TradingRecentTrade'}], 'pageInfo': {'hasNextPage': True, 'hasPreviousPage': False, 'startCursor': 'WyJ0cmFkZV90aW1lc3RhbXBfZGVzYyIsMV0=', 'endCursor': 'WyJ0cmFkZV90aW1lc3RhbXBfZGVzYyIsMV0=', '__typename': 'PageInfo'}, 'totalCount': 335, '__typename': 'TradingRecentTradesConnection'}}}
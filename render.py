@@ -0,0 +1,165 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+TRADE_SEPARATOR = "---------------------------"
+# Room kept for the relative time when packing pages; "59 minutes ago" is the longest in a 24h window
+TIME_AGO_WIDTH = 16
+# Parsed trades kept across store versions, so each trade is parsed once
+RECORD_CAPACITY = 4096
+# Distinct candles/windows whose rendered text is kept
+TEXT_CAPACITY = 64
+
+PRICE_FIELDS = ('open', 'close', 'high', 'low', 'volume', 'timestamp')
+WINDOW_FIELDS = ('open', 'close', 'high', 'low', 'volume', 'time')
+
+
+def time_ago(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds >= 86400:
+        return f"{seconds // 86400} days ago"
+    if seconds >= 3600:
+        return f"{seconds // 3600} hours ago"
+    return f"{seconds // 60} minutes ago"
+
+
+def parse_timestamp(value):
+    # GraphQL timestamps are UTC, naive or with a Z/offset; returns epoch seconds or None
+    if not value or value == 'N/A':
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class TradeRecord:
+    # Everything but the relative time is rendered when the trade is first seen
+    __slots__ = ("txn_hash", "traded_at", "head")
+
+    def __init__(self, trade):
+        self.txn_hash = trade.get('txnHashHex')
+        self.traded_at = parse_timestamp(trade.get('tradeTimestamp', 'N/A'))
+        self.head = (
+            f"Trade Type: {trade.get('tradeType', 'N/A')}\n"
+            f"Trader: {trade.get('traderUsername', 'Unknown')}\n"
+            f"Value (USD): ${trade.get('tradeValueUsd', 0):,.2f}\n"
+            f"Price (USD): ${trade.get('tradePriceUsd', 0):,.2f}\n"
+            f"Traded (DeSo): {trade.get('tradeValueDeso', 0):,.2f}\n"
+            f"Timestamp: "
+        )
+
+    def render(self, now: float) -> str:
+        when = time_ago(now - self.traded_at) if self.traded_at is not None else 'N/A'
+        return f"{self.head}{when}\n{TRADE_SEPARATOR}"
+
+    def width(self) -> int:
+        # Upper bound on the rendered length, used for packing pages before the time is known
+        return len(self.head) + TIME_AGO_WIDTH + 1 + len(TRADE_SEPARATOR)
+
+
+class TradePage:
+    # One message worth of trades; re-rendered at most once a minute, when relative times move
+    __slots__ = ("header", "records", "_minute", "_text")
+
+    def __init__(self, header: str, records):
+        self.header = header
+        self.records = records
+        self._minute = None
+        self._text = None
+
+    def render(self, now: float = None) -> str:
+        now = time.time() if now is None else now
+        minute = int(now // 60)
+        if minute != self._minute:
+            self._text = "\n".join([self.header, *(record.render(now) for record in self.records)])
+            self._minute = minute
+        return self._text
+
+
+class TradeRenderer:
+    def __init__(self, capacity: int = RECORD_CAPACITY):
+        self.capacity = capacity
+        self._records = OrderedDict()
+
+    def record(self, trade) -> TradeRecord:
+        key = trade.get('txnHashHex')
+        record = self._records.get(key) if key else None
+        if record is None:
+            record = TradeRecord(trade)
+            if key:
+                self._records[key] = record
+                if len(self._records) > self.capacity:
+                    self._records.popitem(last=False)
+        return record
+
+    def pages(self, header: str, trades, limit: int = MAX_MESSAGE_LENGTH):
+        # Same packing as bot.paginate, sized with the widest relative time
+        pages = []
+        current, length = [], len(header)
+        for record in (self.record(trade) for trade in trades):
+            width = record.width()
+            if length + 1 + width > limit and current:
+                pages.append(TradePage(header, current))
+                current, length = [], len(header)
+            current.append(record)
+            length += 1 + width
+        if current:
+            pages.append(TradePage(header, current))
+        return pages
+
+
+class TextCache:
+    # Rendered text keyed on the values it was rendered from; repeat answers skip formatting
+    def __init__(self, render, capacity: int = TEXT_CAPACITY):
+        self.render = render
+        self.capacity = capacity
+        self._texts = OrderedDict()
+
+    def get(self, *key) -> str:
+        text = self._texts.get(key)
+        if text is None:
+            text = self._texts[key] = self.render(*key)
+            if len(self._texts) > self.capacity:
+                self._texts.popitem(last=False)
+        else:
+            self._texts.move_to_end(key)
+        return text
+
+
+def _price_text(op, cp, dh, dl, vol, timestamp) -> str:
+    return (
+        f"Current Price Details:\n"
+        f"Open Price: {op}\n"
+        f"Close Price: {cp}\n"
+        f"Day High: {dh}\n"
+        f"Day Low: {dl}\n"
+        f"Volume: {vol}\n"
+        f"Current Time: {timestamp}"
+    )
+
+
+def _window_text(label, op, cp, high, low, volume, start_ms) -> str:
+    return (
+        f"Price Details ({label}):\n"
+        f"Open Price: {op}\n"
+        f"Close Price: {cp}\n"
+        f"High: {high}\n"
+        f"Low: {low}\n"
+        f"Volume: {volume}\n"
+        f"Since: {datetime.fromtimestamp(start_ms / 1000, timezone.utc):%Y-%m-%d %H:%M:%S}"
+    )
+
+
+_price_texts = TextCache(_price_text)
+_window_texts = TextCache(_window_text)
+
+
+def price_message(candle) -> str:
+    return _price_texts.get(*(candle.get(field) for field in PRICE_FIELDS))
+
+
+def window_message(label: str, summary) -> str:
+    return _window_texts.get(label, *(summary[field] for field in WINDOW_FIELDS))
@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import bz2
+import gzip
+import json
+import lzma
+import time
+from collections import deque
+from datetime import datetime, timezone
+from price_alerts import POST_THRESHOLD, evaluate_price_change
+from whale_alerts import WhaleWatcher
+
+# Recordings are JSON lines, optionally compressed:
+#   {"type": "candles", "data": [<candlesticks/history item>, ...]}
+#   {"type": "trades", "data": <tradingRecentTrades GraphQL response>}
+OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+CANDLE_MS = 900000
+# A move counts as a false positive if this many candles later the price is back past the alert candle's open
+DEFAULT_HORIZON = 4
+# Whale alerts are drained on the ingestion job's cadence
+WHALE_INTERVAL = 60.0
+
+
+def open_recording(path: str, mode: str = "rt"):
+    for suffix, opener in OPENERS.items():
+        if path.endswith(suffix):
+            return opener(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def load_recording(path: str):
+    # Overlapping fetches are merged: the last copy of each candle wins and trades are keyed on txnHashHex
+    candles = {}
+    trades = {}
+    with open_recording(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record["type"] == "candles":
+                for candle in record["data"] or []:
+                    candles[int(candle["time"])] = candle
+            elif record["type"] == "trades":
+                for trade in record["data"]["data"]["tradingRecentTrades"]["nodes"]:
+                    trades[trade["txnHashHex"]] = trade
+    return [candles[t] for t in sorted(candles)], sorted(trades.values(), key=lambda t: t["tradeTimestamp"])
+
+
+def trade_epoch(trade) -> float:
+    # Recorded timestamps are naive UTC ISO strings
+    return datetime.fromisoformat(trade["tradeTimestamp"]).replace(tzinfo=timezone.utc).timestamp()
+
+
+class PendingAlert:
+    __slots__ = ("open", "change", "posted", "resolve_at")
+
+    def __init__(self, open_: float, change: float, posted: bool, resolve_at: int):
+        self.open = open_
+        self.change = change
+        self.posted = posted
+        self.resolve_at = resolve_at
+
+
+class ReplayReport:
+    def __init__(self):
+        self.candles = 0
+        self.trades = 0
+        self.broadcasts = 0
+        self.posts = 0
+        self.false_broadcasts = 0
+        self.false_posts = 0
+        self.unresolved = 0
+        self.whale_alerts = 0
+        self.messages = []
+        self.elapsed = 0.0
+
+    @property
+    def events(self) -> int:
+        return self.candles + self.trades
+
+    def summary(self) -> dict:
+        return {
+            "candles": self.candles,
+            "trades": self.trades,
+            "broadcasts": self.broadcasts,
+            "false_positive_broadcasts": self.false_broadcasts,
+            "posts": self.posts,
+            "false_positive_posts": self.false_posts,
+            "unresolved": self.unresolved,
+            "whale_alerts": self.whale_alerts,
+            "elapsed": round(self.elapsed, 4),
+            "events_per_second": round(self.events / self.elapsed) if self.elapsed else None,
+        }
+
+
+def replay(candles, trades, speed: float = 0.0, min_change: float = 0.0, horizon: int = DEFAULT_HORIZON,
+           keep_messages: bool = False) -> ReplayReport:
+    # Streams closed candles and landed trades in time order through the live alert code.
+    # speed=0 runs flat out; otherwise recorded time is compressed by that factor.
+    report = ReplayReport()
+    watcher = WhaleWatcher()
+    pending = deque()
+    events = [(int(c["time"]) / 1000 + CANDLE_MS / 1000, 0, c) for c in candles]
+    events += [(trade_epoch(t), 1, t) for t in trades]
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    def drain_whales():
+        for alert in watcher.drain():
+            report.whale_alerts += 1
+            if keep_messages:
+                report.messages.append(alert.message())
+
+    start = time.perf_counter()
+    previous = events[0][0] if events else 0.0
+    next_drain = previous + WHALE_INTERVAL
+    for at, kind, payload in events:
+        if speed > 0 and at > previous:
+            time.sleep((at - previous) / speed)
+        previous = at
+
+        if at >= next_drain:
+            drain_whales()
+            next_drain = at + WHALE_INTERVAL
+
+        if kind == 1:
+            report.trades += 1
+            watcher.observe([payload], now=datetime.fromtimestamp(at, timezone.utc).replace(tzinfo=None))
+            continue
+
+        report.candles += 1
+        close = payload["close"]
+        while pending and pending[0].resolve_at <= report.candles:
+            alert = pending.popleft()
+            # Reverted: a surge closed back at or below its open, or a drop back at or above it
+            reverted = close <= alert.open if alert.change > 0 else close >= alert.open
+            report.false_broadcasts += reverted
+            report.false_posts += reverted and alert.posted
+
+        result = evaluate_price_change(payload)
+        if result is None or abs(result[1]) < min_change:
+            continue
+        message, change = result
+        posted = abs(change) >= POST_THRESHOLD
+        report.broadcasts += 1
+        report.posts += posted
+        if keep_messages:
+            report.messages.append(message)
+        pending.append(PendingAlert(payload["open"], change, posted, report.candles + horizon))
+
+    # Whales seen after the last interval would have gone out on the next ingestion run
+    drain_whales()
+    report.unresolved = len(pending)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+async def record(path: str, countback: int) -> None:
+    # Snapshots the live candle history and 24h trade window into a replayable file
+    from history_get import fetch_candles
+    from recent_trades import TRADES_QUERY_DOCUMENT, TRADES_QUERY_HASH, TOKEN_PUBLIC_KEY, post_graphql
+    from http_client import close_clients
+
+    candles = await fetch_candles(countback=countback)
+    since = datetime.utcfromtimestamp(time.time() - countback * CANDLE_MS / 1000).isoformat()
+    with open_recording(path, "wt") as file:
+        file.write(json.dumps({"type": "candles", "data": candles}) + "\n")
+        after = None
+        while True:
+            data = await post_graphql(TRADES_QUERY_DOCUMENT, TRADES_QUERY_HASH, {
+                "first": 100,
+                "after": after,
+                "orderBy": ["TRADE_TIMESTAMP_DESC"],
+                "filter": {
+                    "isMatchedOrder": {"equalTo": False},
+                    "tokenPublicKey": {"equalTo": TOKEN_PUBLIC_KEY},
+                    "tradeTimestamp": {"greaterThanOrEqualTo": since},
+                },
+            })
+            if not data or not data.get("data"):
+                break
+            file.write(json.dumps({"type": "trades", "data": data}) + "\n")
+            page_info = data["data"]["tradingRecentTrades"]["pageInfo"]
+            if not page_info["hasNextPage"]:
+                break
+            after = page_info["endCursor"]
+    await close_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded candles and trades through the alert logic")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="replay a recording and report alerts")
+    run.add_argument("path")
+    run.add_argument("--speed", type=float, default=0.0, help="time compression factor; 0 runs as fast as possible")
+    run.add_argument("--min-change", type=float, default=0.0, help="only count moves of at least this %%")
+    run.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="candles before judging a move")
+    run.add_argument("--show", action="store_true", help="print every alert message")
+    rec = commands.add_parser("record", help="snapshot live history into a recording")
+    rec.add_argument("path")
+    rec.add_argument("--countback", type=int, default=672)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args.path, args.countback))
+        return
+    candles, trades = load_recording(args.path)
+    report = replay(candles, trades, args.speed, args.min_change, args.horizon, keep_messages=args.show)
+    for message in report.messages:
+        print(message)
+    print(json.dumps(report.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# "sqlite" shares state between processes on one host; "memory" is for tests and single runs
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "state.db")
+# A leader that misses renewals for this long is replaced
+LEADER_LEASE = float(os.getenv("LEADER_LEASE", "90"))
+PURGE_INTERVAL = 300.0
+
+
+class MemoryBackend:
+    # Same semantics as SQLiteBackend within one process
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._live(key, time.time())
+        return default if entry is None else entry[0]
+
+    def set(self, key: str, value, ttl: float = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+
+    def add(self, key: str, value=True, ttl: float = None) -> bool:
+        # Stores the key only if it is absent or expired; returns whether it was stored
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._data[key] = (value, now + ttl if ttl is not None else None)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        # Takes a free or expired lease, or extends one this owner already holds
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None and entry[0] != owner:
+                return False
+            self._data[key] = (owner, now + ttl)
+            return True
+
+    def release_lease(self, key: str, owner: str) -> None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == owner:
+                del self._data[key]
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend:
+    # Values are JSON; every write is a single statement, so concurrent processes stay consistent
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL) WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params)
+
+    def _purge(self, now: float) -> None:
+        if now - self._purged_at >= PURGE_INTERVAL:
+            self._purged_at = now
+            self._execute("DELETE FROM state WHERE expires_at <= ?", (now,))
+
+    def get(self, key: str, default=None):
+        row = self._execute(
+            "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, key: str, value, ttl: float = None) -> None:
+        now = time.time()
+        self._execute(
+            "INSERT OR REPLACE INTO state VALUES (?, ?, ?)",
+            (key, json.dumps(value), now + ttl if ttl is not None else None),
+        )
+        self._purge(now)
+
+    def add(self, key: str, value=True, ttl: float = None) -> bool:
+        now = time.time()
+        cursor = self._execute(
+            "INSERT INTO state VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE "
+            "SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE state.expires_at IS NOT NULL AND state.expires_at <= ?",
+            (key, json.dumps(value), now + ttl if ttl is not None else None, now),
+        )
+        self._purge(now)
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        self._execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        owner_json = json.dumps(owner)
+        cursor = self._execute(
+            "INSERT INTO state VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE "
+            "SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE state.value = excluded.value OR state.expires_at <= ?",
+            (key, owner_json, now + ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, key: str, owner: str) -> None:
+        self._execute("DELETE FROM state WHERE key = ? AND value = ?", (key, json.dumps(owner)))
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def create_backend(kind: str = STATE_BACKEND):
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown state backend: {kind}")
+
+
+def instance_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderElection:
+    # Only the lease holder runs the jobs that post or broadcast, and in polling mode it is also the only
+    # instance calling getUpdates; in webhook mode every instance serves commands
+    def __init__(self, backend, name: str = "leader", owner: str = None, lease: float = LEADER_LEASE):
+        self.backend = backend
+        self.key = f"lease:{name}"
+        self.owner = owner or instance_id()
+        self.lease = lease
+        self.leader = False
+
+    def is_leader(self) -> bool:
+        # Acquires or renews the lease; call at least every lease / 3 seconds to keep it
+        leader = self.backend.acquire_lease(self.key, self.owner, self.lease)
+        if leader != self.leader:
+            logger.info(f"{self.owner} {'became' if leader else 'is no longer'} the leader")
+            self.leader = leader
+        return leader
+
+    def resign(self) -> None:
+        if self.leader:
+            self.backend.release_lease(self.key, self.owner)
+            self.leader = False
@@ -1,27 +1,21 @@
+import asyncio
+import binascii
 import hashlib
 import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
-from typing import Optional, Dict, Any, List, Union
-from pprint import pprint
-import sys
-
-from typing import Tuple, Optional
-import binascii
-from bip32 import BIP32, base58
-from mnemonic import Mnemonic
+from bip32 import base58
 from coincurve import PrivateKey
-
-import hashlib
-from typing import Optional
-from ecdsa import SigningKey, SECP256k1
-from ecdsa.util import sigencode_der
-
-import time
+from dotenv import load_dotenv
 from requests.exceptions import RequestException
 
-import os
-from dotenv import load_dotenv
+import metrics
+from http_client import get_sync_session
+from commitment import CommitmentTracker
+from post_pipeline import PostPipeline
 
 # Load environment variables from .env file
 load_dotenv()
@@ -56,6 +50,10 @@ def create_key_pair_from_seed_or_seed_hex(
     except binascii.Error:
         # Not a valid hex string, treat as mnemonic
         try:
+            # Only mnemonic seeds need the wordlist and HD derivation code
+            from bip32 import BIP32
+            from mnemonic import Mnemonic
+
             # Validate and convert mnemonic to seed
             mnemo = Mnemonic("english")
             if not mnemo.check(seed):
@@ -99,6 +97,8 @@ class DeSoDexClient:
         if desoKeyPair is None:
             raise ValueError(err)
         self.deso_keypair = desoKeyPair
+        # Built once and reused for every signature
+        self.signing_key = PrivateKey(desoKeyPair.private_key)
         self.public_key_base58 = pubkey_to_base58(
             desoKeyPair.public_key, is_testnet)
 
@@ -166,7 +166,7 @@ class DeSoDexClient:
             "Content-Type": "application/json",
         }
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = get_sync_session().post(url, json=payload, headers=headers)
 
         try:
             response.raise_for_status()
@@ -185,13 +185,8 @@ class DeSoDexClient:
             first_hash = hashlib.sha256(txn_bytes).digest()
             txn_hash = hashlib.sha256(first_hash).digest()
 
-            # Create signing key from private key bytes
-            signing_key = SigningKey.from_string(
-                self.deso_keypair.private_key, curve=SECP256k1)
-
-            # Sign the hash
-            signature = signing_key.sign_digest(
-                txn_hash, sigencode=sigencode_der)
+            # Sign the precomputed hash with the cached libsecp256k1 key (DER encoded)
+            signature = self.signing_key.sign(txn_hash, hasher=None)
 
             # Convert signature to hex
             signature_hex = signature.hex()
@@ -214,15 +209,15 @@ class DeSoDexClient:
             "Content-Type": "application/json"
         }
 
-        response = requests.post(
+        response = get_sync_session().post(
             submit_url,
             data=json.dumps(payload),
             headers=headers
         )
 
         if response.status_code != 200:
-            print(f"Error status returned from {submit_url}: {
-                  response.status_code}, {response.text}")
+            print(f"Error status returned from {submit_url}: "
+                  f"{response.status_code}, {response.text}")
             raise ValueError(
                 f"Error status returned from {submit_url}: "
                 f"{response.status_code}, {response.text}"
@@ -245,7 +240,7 @@ class DeSoDexClient:
             "TransactionSignaturesHex": txn_signatures_hex
         }
 
-        response = requests.post(url, json=payload)
+        response = get_sync_session().post(url, json=payload)
 
         try:
             response.raise_for_status()
@@ -255,12 +250,42 @@ class DeSoDexClient:
             except ValueError:
                 error_json = response.text
             raise requests.exceptions.HTTPError(
-                f"Error status returned from {url}: {
-                    response.status_code}, {error_json}"
+                f"Error status returned from {url}: "
+                f"{response.status_code}, {error_json}"
             )
 
         return response.json()
-    
+
+    def create_atomic_txns_wrapper(
+            self,
+            unsigned_txn_hexes: List[str],
+            extra_data: Optional[Dict[str, str]] = None,
+            min_fee_rate_nanos_per_kb: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Wrap already constructed transactions into one atomic transaction.
+
+        The response carries TransactionHex and InnerTransactionHexes, so it
+        can be passed straight to sign_and_submit_txn.
+        """
+        url = f"{self.node_url}/api/v0/create-atomic-txns-wrapper"
+
+        payload = {
+            "Transactions": unsigned_txn_hexes,
+            "ExtraData": extra_data or {},
+            "MinFeeRateNanosPerKB": min_fee_rate_nanos_per_kb,
+        }
+
+        response = get_sync_session().post(url, json=payload)
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            error_json = response.json() if response.content else response.text
+            raise ValueError(f"HTTP Error: {e}, Response: {error_json}")
+
+        return response.json()
+
     def get_transaction(self, txn_hash_hex: str, committed_txns_only: bool) -> Dict[str, Any]:
         url = f"{self.node_url}/api/v0/get-txn"
 
@@ -277,7 +302,7 @@ class DeSoDexClient:
             "Content-Type": "application/json",
         }
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = get_sync_session().post(url, json=payload, headers=headers)
 
         try:
             response.raise_for_status()
@@ -328,27 +353,59 @@ class DeSoDexClient:
             return hex(base_units)
         return str(base_units)
 
+# Configuration YOGAR configuration
+IS_TESTNET = False
+NODE_URL = "https://test.deso.org" if IS_TESTNET else "https://node.deso.org"
+# Optional second node that read-only lookups are hedged to
+SECONDARY_NODE_URL = os.getenv("DESO_SECONDARY_NODE_URL")
+
+_client = None
+_commitment_tracker = None
+_post_pipeline = None
+
+def get_client(is_testnet: bool = IS_TESTNET, node_url: str = NODE_URL) -> DeSoDexClient:
+    # Long-lived client so the key pair is derived once per process
+    global _client
+    if _client is None:
+        _client = DeSoDexClient(
+            is_testnet=is_testnet,
+            seed_phrase_or_hex=os.getenv("SEED_HEX"),
+            node_url=node_url
+        )
+    return _client
+
+def get_commitment_tracker() -> CommitmentTracker:
+    # Shared so every pending post is watched by a single polling loop
+    global _commitment_tracker
+    if _commitment_tracker is None:
+        _commitment_tracker = CommitmentTracker(get_client().node_url, secondary_node_url=SECONDARY_NODE_URL)
+    return _commitment_tracker
+
+def get_post_pipeline() -> PostPipeline:
+    # Alerts are queued here so bursts share round trips and, when possible, one atomic txn
+    global _post_pipeline
+    if _post_pipeline is None:
+        _post_pipeline = PostPipeline(get_client(), os.getenv("PUBLIC_KEY"), get_commitment_tracker())
+    return _post_pipeline
+
+async def close_post_pipeline() -> None:
+    if _post_pipeline is not None:
+        await _post_pipeline.close()
+
 async def post_to_deso(message: str):
-    # Configuration YOGAR configuration
-    SEED_HEX = os.getenv("SEED_HEX")
-    IS_TESTNET = False
-    NODE_URL = "https://test.deso.org" if IS_TESTNET else "https://node.deso.org"
-    explorer_link = "https://testnet.deso.org" if IS_TESTNET else "https://deso.org"
-
-    # Initialize the client
-    client = DeSoDexClient(
-        is_testnet=IS_TESTNET,
-        seed_phrase_or_hex=SEED_HEX,
-        node_url=NODE_URL
-    )
+    client = get_client()
+    explorer_link = "https://testnet.deso.org" if client.is_testnet else "https://deso.org"
 
     # Your public key (replace with actual)
     string_pubkey = os.getenv("PUBLIC_KEY")
 
     print("\n---- Submit Post ----")
     try:    
+        # The node calls are blocking, so run them off the event loop
         print('Constructing submit-post txn...')
-        post_response = client.submit_post(
+        submit_started = time.perf_counter()
+        post_response = await asyncio.to_thread(
+            client.submit_post,
             updater_public_key_base58check=string_pubkey,
             body=message,
             parent_post_hash_hex="",  # Example parent post hash
@@ -361,14 +418,19 @@ async def post_to_deso(message: str):
             in_tutorial=False
         )
         print('Signing and submitting txn...')
-        submitted_txn_response = client.sign_and_submit_txn(post_response)
+        submitted_txn_response = await asyncio.to_thread(client.sign_and_submit_txn, post_response)
         txn_hash = submitted_txn_response['TxnHashHex']
+        submitted = time.perf_counter()
+        metrics.txn_submit_latency.observe(submitted - submit_started)
         print(f'Waiting for commitment... Hash = {txn_hash}. Find on {explorer_link}/txn/{txn_hash}. Sometimes it takes a minute to show up on the block explorer.')
-        client.wait_for_commitment_with_timeout(txn_hash, 30.0)
+        await get_commitment_tracker().wait(txn_hash, 30.0)
+        metrics.txn_commit_latency.observe(time.perf_counter() - submitted)
+        metrics.posts_total.inc("committed")
         print('SUCCESS!')
     except Exception as e:
+        metrics.posts_total.inc("failed")
         print(f"ERROR: Submit post call failed: {e}")
 
 
 if __name__ == "__main__":
-    post_to_deso("IT WORKED!")
+    asyncio.run(post_to_deso("IT WORKED!"))
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_DB_PATH = os.getenv("SUBSCRIBER_DB_PATH", "subscribers.db")
+LEGACY_CHAT_IDS_PATH = "chat_ids.json"
+
+# Per-subscriber attributes; new columns are added to existing databases on startup
+ATTRIBUTE_COLUMNS = {
+    "threshold": "REAL",
+    "muted": "INTEGER NOT NULL DEFAULT 0",
+    "language": "TEXT NOT NULL DEFAULT 'en'",
+    "whale_alerts": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class SubscriberStore:
+    def __init__(self, path: str = SUBSCRIBER_DB_PATH, legacy_path: str = LEGACY_CHAT_IDS_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS subscribers (chat_id INTEGER PRIMARY KEY, subscribed_at REAL NOT NULL)"
+        )
+        # One-off imports already done, so they are not repeated
+        self.conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)")
+        existing = {row["name"] for row in self.conn.execute("PRAGMA table_info(subscribers)")}
+        for name, column_type in ATTRIBUTE_COLUMNS.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE subscribers ADD COLUMN {name} {column_type}")
+        self.conn.commit()
+
+        self._migrate_legacy_file(legacy_path)
+
+        # O(1) membership checks without touching the database
+        self._load()
+
+    def _load(self) -> None:
+        self._ids = {row["chat_id"] for row in self.conn.execute("SELECT chat_id FROM subscribers")}
+        self._muted = {row["chat_id"] for row in self.conn.execute("SELECT chat_id FROM subscribers WHERE muted = 1")}
+        self._whales = {
+            row["chat_id"] for row in self.conn.execute("SELECT chat_id FROM subscribers WHERE whale_alerts = 1")
+        }
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self) -> None:
+        # Reload the cached sets when another process sharing the database has committed
+        if self.conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._load()
+
+    def _migrate_legacy_file(self, legacy_path: str) -> None:
+        # Import chat_ids.json once, recorded in the database so removed chats are not re-imported;
+        # the file itself is left alone
+        if not legacy_path or not os.path.exists(legacy_path):
+            return
+        name = os.path.basename(legacy_path)
+        if self.conn.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone():
+            return
+        with open(legacy_path, 'r') as file:
+            chat_ids = json.load(file)
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO subscribers (chat_id, subscribed_at) VALUES (?, ?)",
+                [(chat_id, now) for chat_id in chat_ids],
+            )
+            self.conn.execute("INSERT INTO migrations (name) VALUES (?)", (name,))
+        logger.info(f"Migrated {len(chat_ids)} subscribers from {legacy_path}")
+
+    def __contains__(self, chat_id) -> bool:
+        return chat_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, chat_id: int) -> bool:
+        # Returns False when the chat was already subscribed
+        self.refresh()
+        if chat_id in self._ids:
+            return False
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO subscribers (chat_id, subscribed_at) VALUES (?, ?)", (chat_id, time.time())
+            )
+        self._ids.add(chat_id)
+        return True
+
+    def remove(self, chat_ids) -> int:
+        chat_ids = [chat_id for chat_id in chat_ids if chat_id in self._ids]
+        if not chat_ids:
+            return 0
+        with self.conn:
+            self.conn.executemany("DELETE FROM subscribers WHERE chat_id = ?", [(chat_id,) for chat_id in chat_ids])
+        self._ids.difference_update(chat_ids)
+        self._muted.difference_update(chat_ids)
+        self._whales.difference_update(chat_ids)
+        return len(chat_ids)
+
+    def get(self, chat_id: int):
+        row = self.conn.execute("SELECT * FROM subscribers WHERE chat_id = ?", (chat_id,)).fetchone()
+        return dict(row) if row else None
+
+    def set_attribute(self, chat_id: int, name: str, value) -> None:
+        if name not in ATTRIBUTE_COLUMNS:
+            raise ValueError(f"Unknown subscriber attribute: {name}")
+        with self.conn:
+            self.conn.execute(f"UPDATE subscribers SET {name} = ? WHERE chat_id = ?", (value, chat_id))
+        cached = {"muted": self._muted, "whale_alerts": self._whales}.get(name)
+        if cached is not None:
+            if value:
+                cached.add(chat_id)
+            else:
+                cached.discard(chat_id)
+
+    def active_chat_ids(self):
+        # Everyone who should receive broadcasts
+        self.refresh()
+        return [chat_id for chat_id in self._ids if chat_id not in self._muted]
+
+    def whale_chat_ids(self):
+        # Active subscribers who opted into whale-trade alerts
+        self.refresh()
+        return [chat_id for chat_id in self._whales if chat_id not in self._muted]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+
+import upstream
+
+
+class FaultyUpstream:
+    # In-process stand-in for an upstream host: answers each call from a script of
+    # status codes, exceptions to raise, or (delay, status) pairs
+    def __init__(self, *script, default=200):
+        self.script = list(script)
+        self.default = default
+        self.calls = []
+        self.cancelled = []
+
+    async def __call__(self, http_request):
+        self.calls.append(http_request)
+        step = self.script.pop(0) if self.script else self.default
+        if isinstance(step, tuple):
+            delay, step = step
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.cancelled.append(http_request.url.host)
+                raise
+        if isinstance(step, Exception):
+            raise step
+        return httpx.Response(step, json={"host": http_request.url.host}, request=http_request)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    # Routes upstream.request through the given handler, with fresh breakers and no backoff sleeps
+    monkeypatch.setattr(upstream, "_breakers", {})
+    monkeypatch.setattr(upstream, "backoff_delay", lambda attempt: 0.0)
+
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(upstream, "get_async_client", lambda: client)
+        return handler
+    return install
+
+
+@pytest.fixture
+def make_trades():
+    # Factory for n trades, oldest first, one minute apart, the newest a minute before now
+    def make(n, now):
+        return [
+            {
+                "txnHashHex": f"{i:064x}",
+                "tradeTimestamp": (now - timedelta(minutes=n - i)).isoformat(),
+                "tradeType": "BUY" if i % 2 else "SELL",
+                "traderUsername": f"trader{i % 5}",
+                "tradeValueUsd": 100.0 + i,
+                "tradeValueDeso": 1.0,
+                "tradePriceUsd": 10.0,
+                "traderPublicKey": f"BC1YLtrader{i % 5}",
+            }
+            for i in range(n)
+        ]
+    return make
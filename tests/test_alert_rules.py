@@ -0,0 +1,136 @@
+from alert_rules import AlertRule, RuleEngine, RuleStore, SortedRuleIndex
+
+
+def index_of(*thresholds):
+    index = SortedRuleIndex()
+    for rule_id, threshold in enumerate(thresholds, 1):
+        index.add(AlertRule(rule_id, 1, "above", threshold))
+    return index
+
+
+def ids(rules):
+    return sorted(rule.rule_id for rule in rules)
+
+
+def test_pop_at_most_includes_a_threshold_equal_to_the_price():
+    index = index_of(10.0, 11.0, 12.0)
+    assert ids(index.pop_at_most(10.999)) == [1]
+    assert ids(index.pop_at_most(11.0)) == [2]
+    assert index.keys == [12.0]
+
+
+def test_pop_at_least_includes_a_threshold_equal_to_the_price():
+    index = index_of(10.0, 11.0, 12.0)
+    assert ids(index.pop_at_least(11.001)) == [3]
+    assert ids(index.pop_at_least(11.0)) == [2]
+    assert index.keys == [10.0]
+
+
+def test_remove_picks_the_right_rule_among_equal_thresholds():
+    index = index_of(5.0, 7.0, 7.0, 7.0, 9.0)
+    assert index.remove(AlertRule(3, 1, "above", 7.0))
+    assert not index.remove(AlertRule(3, 1, "above", 7.0))
+    # Same id at a threshold it was never added with
+    assert not index.remove(AlertRule(2, 1, "above", 9.0))
+    assert [rule.rule_id for rule in index.rules] == [1, 2, 4, 5]
+    assert index.keys == sorted(index.keys)
+
+
+def test_above_and_below_fire_once():
+    engine = RuleEngine()
+    above = engine.add(1, "above", 12.0)
+    below = engine.add(2, "below", 10.0)
+    assert engine.on_price(11.0) == []
+    assert engine.on_price(12.0) == [(above, 12.0)]
+    assert engine.on_price(10.0) == [(below, 10.0)]
+    assert engine.on_price(12.5) == [] and len(engine) == 0
+
+
+def test_rise_and_drop_rules_only_fire_on_their_window():
+    engine = RuleEngine()
+    rise_15m = engine.add(1, "rise", 5.0, 900)
+    rise_1h = engine.add(2, "rise", 5.0, 3600)
+    drop_1h = engine.add(3, "drop", 8.0, 3600)
+    assert engine.windows() == {900, 3600}
+
+    assert engine.on_change(900, 6.0) == [(rise_15m, 6.0)]
+    # A drop never fires rise rules, and only crosses the drop threshold at or past it
+    assert engine.on_change(3600, -7.9) == []
+    assert engine.on_change(3600, -8.0) == [(drop_1h, -8.0)]
+    assert engine.on_change(14400, 20.0) == []
+    assert engine.on_change(3600, 5.0) == [(rise_1h, 5.0)]
+    assert engine.windows() == set()
+
+
+def test_removed_rules_do_not_fire():
+    engine = RuleEngine()
+    rule = engine.add(1, "drop", 5.0, 900)
+    assert engine.remove(rule.rule_id) is rule
+    assert engine.remove(rule.rule_id) is None
+    assert engine.on_change(900, -10.0) == []
+    assert engine.rules_for(1) == []
+
+
+def test_new_rule_ids_stay_ahead_of_loaded_ones():
+    engine = RuleEngine()
+    engine.add(1, "above", 12.0, rule_id=7)
+    engine.add(1, "above", 13.0, rule_id=3)
+    assert engine.add(1, "above", 14.0).rule_id == 8
+    assert engine.add(1, "above", 15.0).rule_id == 9
+
+
+def test_engine_is_rebuilt_from_storage(tmp_path):
+    store = RuleStore(str(tmp_path / "alert_rules.db"))
+    first = store.insert(1, "above", 12.0)
+    second = store.insert(2, "drop", 5.0, 3600)
+    engine = store.load(RuleEngine())
+
+    assert sorted(engine.by_id) == [first, second]
+    assert engine.by_id[second].window == 3600
+    assert engine.add(3, "below", 9.0).rule_id > second
+    store.close()
+
+
+def test_bulk_load_matches_adding_one_by_one():
+    rows = [(1, 1, "above", 12.0, 900), (2, 2, "above", 10.0, 900), (3, 1, "above", 12.0, 900),
+            (4, 3, "drop", 5.0, 3600), (5, 3, "drop", 2.0, 900)]
+    loaded, added = RuleEngine(), RuleEngine()
+    loaded.load(rows)
+    for rule_id, chat_id, kind, threshold, window in rows:
+        added.add(chat_id, kind, threshold, window, rule_id=rule_id)
+
+    assert [rule.rule_id for rule in loaded.above.rules] == [rule.rule_id for rule in added.above.rules] == [2, 1, 3]
+    assert loaded.above.keys == [10.0, 12.0, 12.0]
+    assert sorted(loaded.drop) == [900, 3600]
+    assert loaded.add(1, "below", 9.0).rule_id == 6
+
+
+def test_sync_applies_only_changes_from_another_instance(tmp_path):
+    path = str(tmp_path / "alert_rules.db")
+    ours, theirs = RuleStore(path), RuleStore(path)
+    kept = theirs.insert(1, "above", 12.0)
+    removed = theirs.insert(1, "above", 13.0)
+    engine = ours.load(RuleEngine())
+    ours.changed()
+
+    added = theirs.insert(2, "below", 9.0)
+    theirs.delete([removed])
+    assert ours.changed()
+    assert ours.sync(engine)
+    assert sorted(engine.by_id) == [kept, added]
+    assert ids(engine.above.rules) == [kept]
+    assert not ours.changed()
+    ours.close()
+    theirs.close()
+
+
+def test_sync_asks_for_a_reload_once_the_change_log_is_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr("alert_rules.CHANGE_LOG_SIZE", 1)
+    path = str(tmp_path / "alert_rules.db")
+    ours, theirs = RuleStore(path), RuleStore(path)
+    engine = ours.load(RuleEngine())
+
+    theirs.delete([theirs.insert(1, "above", 12.0), theirs.insert(1, "above", 13.0)])
+    assert not ours.sync(engine)
+    ours.close()
+    theirs.close()
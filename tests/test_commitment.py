@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from commitment import CommitmentTracker
+
+NODE_URL = "http://node.test"
+
+
+class StubNode:
+    # get-txn for one transaction: reports it committed from the `commit_on`-th lookup, after
+    # answering the listed lookups (1-based) with a failure instead
+    def __init__(self, commit_on=None, failures=None):
+        self.commit_on = commit_on
+        self.failures = failures or {}
+        self.lookups = 0
+        self.delays = []
+        self.tracker = None
+
+    async def __call__(self, http_request):
+        self.lookups += 1
+        pending = self.tracker._pending.get("txn") if self.tracker else None
+        if pending is not None:
+            self.delays.append(pending.delay)
+        failure = self.failures.get(self.lookups)
+        if isinstance(failure, Exception):
+            raise failure
+        if failure is not None:
+            return httpx.Response(failure, request=http_request)
+        found = self.commit_on is not None and self.lookups >= self.commit_on
+        return httpx.Response(200, json={"TxnFound": found}, request=http_request)
+
+
+def tracker_for(node, **kwargs):
+    node.tracker = CommitmentTracker(NODE_URL, **kwargs)
+    return node.tracker
+
+
+def test_resolves_on_commit(stub):
+    node = stub(StubNode(commit_on=3))
+    tracker = tracker_for(node, initial_delay=0.01)
+
+    async def scenario():
+        return await tracker.watch("txn", 5.0)
+
+    assert asyncio.run(scenario()) == "txn"
+    assert node.lookups == 3
+    assert not tracker._pending
+
+
+def test_times_out_at_the_deadline(stub):
+    node = stub(StubNode())
+    tracker = tracker_for(node, initial_delay=0.01, max_delay=0.02)
+
+    async def scenario():
+        await tracker.wait("txn", 0.1)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        asyncio.run(scenario())
+    assert 0.1 <= time.monotonic() - started < 0.5
+    assert not tracker._pending
+
+
+def test_backoff_doubles_up_to_max_delay(stub):
+    node = stub(StubNode(commit_on=6))
+    tracker = tracker_for(node, initial_delay=0.01, max_delay=0.04)
+
+    async def scenario():
+        await tracker.wait("txn", 5.0)
+
+    asyncio.run(scenario())
+    assert node.delays == [0.01, 0.02, 0.04, 0.04, 0.04, 0.04]
+
+
+def test_repeated_watch_shares_one_future(stub):
+    node = stub(StubNode(commit_on=2))
+    tracker = tracker_for(node, initial_delay=0.01)
+
+    async def scenario():
+        first = tracker.watch("txn", 5.0)
+        second = tracker.watch("txn", 5.0)
+        assert first is second
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == ["txn", "txn"]
+    assert node.lookups == 2
+
+
+def test_node_errors_do_not_fail_the_watch(stub):
+    node = stub(StubNode(commit_on=1, failures={1: 500, 2: httpx.ReadError("connection lost"), 3: 429}))
+    tracker = tracker_for(node, initial_delay=0.01, max_delay=0.02)
+
+    async def scenario():
+        return await tracker.watch("txn", 5.0)
+
+    assert asyncio.run(scenario()) == "txn"
+    assert node.lookups == 4
@@ -0,0 +1,38 @@
+import asyncio
+
+from post_pipeline import PostPipeline
+
+
+class FakeClient:
+    # Constructs and submits every post, but the node rejects the atomic wrapper
+    def __init__(self):
+        self.submitted = []
+
+    def submit_post(self, updater_public_key_base58check, body, **kwargs):
+        return {"TransactionHex": body.encode().hex(), "FeeNanos": 100}
+
+    def create_atomic_txns_wrapper(self, unsigned_txn_hexes):
+        raise ValueError("HTTP Error: 400 Bad Request")
+
+    def sign_and_submit_txn(self, constructed):
+        self.submitted.append(constructed["TransactionHex"])
+        return {"TxnHashHex": f"hash-{constructed['TransactionHex']}"}
+
+
+class FakeTracker:
+    async def wait(self, txn_hash, timeout):
+        return None
+
+
+def test_batch_is_submitted_singly_when_atomic_wrap_fails():
+    async def scenario():
+        client = FakeClient()
+        pipeline = PostPipeline(client, "BC1YLmock", FakeTracker(), coalesce_window=0.05, atomic=True)
+        hashes = await asyncio.gather(*(pipeline.enqueue(f"post {i}") for i in range(3)))
+        await pipeline.close()
+        return client, pipeline, hashes
+
+    client, pipeline, hashes = asyncio.run(scenario())
+    assert len(client.submitted) == 3
+    assert hashes == [f"hash-{f'post {i}'.encode().hex()}" for i in range(3)]
+    assert pipeline.stats() == {"posts": 3, "transactions": 3, "fee_nanos_per_post": 100.0}
@@ -0,0 +1,19 @@
+import json
+
+from subscribers import SubscriberStore
+
+
+def test_legacy_chat_ids_are_imported_once_and_left_in_place(tmp_path):
+    legacy = tmp_path / "chat_ids.json"
+    legacy.write_text(json.dumps([1, 2, 3]))
+    db = str(tmp_path / "subscribers.db")
+
+    store = SubscriberStore(db, str(legacy))
+    assert sorted(store.active_chat_ids()) == [1, 2, 3]
+    store.remove([2])
+    store.close()
+
+    store = SubscriberStore(db, str(legacy))
+    assert sorted(store.active_chat_ids()) == [1, 3]
+    assert legacy.exists()
+    store.close()
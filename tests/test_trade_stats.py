@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from trade_stats import TradeStatsCache
+from trade_store import TradeStore
+
+
+def test_late_trades_with_older_timestamps_are_counted(tmp_path, make_trades):
+    now = datetime.utcnow()
+    trades = make_trades(200, now)
+    store = TradeStore(str(tmp_path / "trades.db"))
+    cache = TradeStatsCache(store)
+
+    store.append(trades[100:])
+    assert cache.get(now).trades == 100
+    # Stored after the first load, but traded before everything already loaded
+    store.append(trades[:100])
+    assert cache.get(now).trades == 200
+    store.close()
+
+
+def test_window_drops_trades_older_than_a_day(tmp_path, make_trades):
+    now = datetime.utcnow()
+    store = TradeStore(str(tmp_path / "trades.db"))
+    cache = TradeStatsCache(store)
+    store.append(make_trades(120, now))
+
+    assert cache.get(now).trades == 120
+    assert cache.get(now + timedelta(days=1, minutes=-60)).trades == 60
+    store.close()
+
+
+def test_traders_who_left_the_window_are_forgotten(tmp_path, make_trades):
+    now = datetime.utcnow()
+    trades = make_trades(10, now)
+    for trade in trades[:5]:
+        trade["traderPublicKey"] = f"BC1YLgone{trade['traderPublicKey']}"
+        trade["traderUsername"] = f"gone{trade['traderUsername']}"
+    store = TradeStore(str(tmp_path / "trades.db"))
+    cache = TradeStatsCache(store)
+    store.append(trades)
+    assert cache.get(now).trades == 10
+    assert len(cache.columns.usernames) == 10
+
+    result = cache.get(now + timedelta(days=1, minutes=-5))
+    assert sorted(cache.columns.usernames) == [f"trader{i}" for i in range(5)]
+    assert sorted(name for name, _, _ in result.top_traders) == [f"trader{i}" for i in range(5)]
+    store.close()
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime
+
+import trade_store
+from trade_store import TradeStore, ingest_recent_trades
+
+
+class FakeGraphQL:
+    # Pages the trades like tradingRecentTrades, failing the listed calls (1-based) like an upstream error
+    def __init__(self, trades, fail_calls=()):
+        self.trades = trades
+        self.fail_calls = set(fail_calls)
+        self.calls = 0
+
+    async def __call__(self, document, query_hash, variables):
+        self.calls += 1
+        if self.calls in self.fail_calls:
+            return None
+        since = variables["filter"]["tradeTimestamp"]["greaterThanOrEqualTo"]
+        matching = [t for t in self.trades if t["tradeTimestamp"] >= since]
+        if "TRADE_TIMESTAMP_DESC" in variables["orderBy"]:
+            matching.reverse()
+        offset = int(variables["after"]) + 1 if variables.get("after") else 0
+        end = min(offset + variables["first"], len(matching))
+        return {"data": {"tradingRecentTrades": {
+            "nodes": matching[offset:end],
+            "pageInfo": {"hasNextPage": end < len(matching), "endCursor": str(end - 1)},
+        }}}
+
+
+def test_failed_page_does_not_lose_older_trades(tmp_path, monkeypatch, make_trades):
+    now = datetime.utcnow()
+    trades = make_trades(300, now)
+    fake = FakeGraphQL(trades, fail_calls={2})
+    monkeypatch.setattr(trade_store, "post_graphql", fake)
+    store = TradeStore(str(tmp_path / "trades.db"))
+
+    for _ in range(3):
+        asyncio.run(ingest_recent_trades(store))
+
+    count = store.conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    assert count == len(trades)
+    store.close()
+
+
+def test_ingest_resumes_from_newest_stored_trade(tmp_path, monkeypatch, make_trades):
+    now = datetime.utcnow()
+    trades = make_trades(250, now)
+    monkeypatch.setattr(trade_store, "post_graphql", FakeGraphQL(trades))
+    store = TradeStore(str(tmp_path / "trades.db"))
+
+    assert asyncio.run(ingest_recent_trades(store)) == 250
+    assert asyncio.run(ingest_recent_trades(store)) == 0
+    store.close()
+
+
+def test_backlog_is_crawled_a_few_pages_per_run(tmp_path, monkeypatch, make_trades):
+    now = datetime.utcnow()
+    trades = make_trades(500, now)
+    fake = FakeGraphQL(trades)
+    monkeypatch.setattr(trade_store, "post_graphql", fake)
+    monkeypatch.setattr(trade_store, "INGEST_MAX_PAGES", 2)
+    store = TradeStore(str(tmp_path / "trades.db"))
+
+    assert asyncio.run(ingest_recent_trades(store)) == 200
+    assert fake.calls == 2
+    while asyncio.run(ingest_recent_trades(store)):
+        pass
+    count = store.conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+    assert count == len(trades)
+    store.close()
+
+
+def test_seq_follows_insertion_order(tmp_path, make_trades):
+    now = datetime.utcnow()
+    trades = make_trades(20, now)
+    store = TradeStore(str(tmp_path / "trades.db"))
+    store.append(trades[10:])
+    store.append(trades[:10])
+
+    rows = store.rows_after(0)
+    assert [row[0] for row in rows] == list(range(1, 21))
+    assert [row[1] for row in rows] == [t["tradeTimestamp"] for t in trades[10:] + trades[:10]]
+    assert len(store.rows_after(15)) == 5
+    store.close()
+
+
+def test_newest_hash_is_shared_by_every_connection(tmp_path, make_trades):
+    now = datetime.utcnow()
+    trades = make_trades(10, now)
+    path = str(tmp_path / "trades.db")
+    leader, follower = TradeStore(path), TradeStore(path)
+
+    assert follower.newest_hash() == ""
+    leader.append(trades[5:])
+    # An older trade stored later is the newest by insertion
+    leader.append(trades[:1])
+    assert follower.newest_hash() == leader.newest_hash() == trades[0]["txnHashHex"]
+    leader.close()
+    follower.close()
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import upstream
+from cache import TTLCache
+from conftest import FaultyUpstream
+from upstream import CircuitBreaker, CircuitOpenError, UpstreamError, hedged_request, request
+
+
+def test_breaker_opens_then_half_opens_then_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    # One probe goes through; everyone else waits for its outcome
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_retryable_statuses_are_retried(stub):
+    upstream_host = stub(FaultyUpstream(429, 503, 200))
+    response = asyncio.run(request("GET", "http://focus.test/api"))
+    assert response.status_code == 200
+    assert len(upstream_host.calls) == 3
+
+
+def test_client_errors_are_not_retried(stub):
+    upstream_host = stub(FaultyUpstream(404))
+    assert asyncio.run(request("GET", "http://focus.test/api")).status_code == 404
+    assert len(upstream_host.calls) == 1
+
+
+def test_post_is_not_repeated_once_sent(stub):
+    upstream_host = stub(FaultyUpstream(httpx.ReadError("connection lost"), default=200))
+    with pytest.raises(UpstreamError):
+        asyncio.run(request("POST", "http://node.test/api/v0/submit-transaction", json={}))
+    assert len(upstream_host.calls) == 1
+
+
+def test_post_is_retried_when_the_connection_never_opened(stub):
+    upstream_host = stub(FaultyUpstream(httpx.ConnectError("refused"), default=200))
+    response = asyncio.run(request("POST", "http://node.test/api/v0/submit-transaction", json={}))
+    assert response.status_code == 200
+    assert len(upstream_host.calls) == 2
+
+
+def test_open_breaker_fails_fast(stub):
+    upstream_host = stub(FaultyUpstream(default=503))
+    for _ in range(upstream.FAILURE_THRESHOLD):
+        with pytest.raises(UpstreamError):
+            asyncio.run(request("GET", "http://focus.test/api", retries=0))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(request("GET", "http://focus.test/api"))
+    assert len(upstream_host.calls) == upstream.FAILURE_THRESHOLD
+
+
+def test_hedged_request_returns_first_success_and_cancels_the_loser(stub):
+    async def route(http_request):
+        return await hosts[http_request.url.host](http_request)
+
+    hosts = {"slow.test": FaultyUpstream((1.0, 200)), "fast.test": FaultyUpstream(200)}
+    stub(route)
+
+    async def scenario():
+        response = await hedged_request("GET", ["http://slow.test/get-txn", "http://fast.test/get-txn"],
+                                        hedge_delay=0.05)
+        # Let the cancelled attempt unwind
+        await asyncio.sleep(0)
+        return response
+
+    started = time.perf_counter()
+    response = asyncio.run(scenario())
+    assert response.json() == {"host": "fast.test"}
+    assert time.perf_counter() - started < 0.5
+    assert hosts["slow.test"].cancelled == ["slow.test"]
+
+
+def test_cache_serves_last_good_value_while_the_breaker_is_open(stub):
+    upstream_host = stub(FaultyUpstream(default=200))
+    cache = TTLCache()
+    url = "http://focus.test/api/v0/tokens/candlesticks/history"
+
+    async def fetch():
+        return (await request("GET", url)).json()
+
+    async def scenario():
+        first = await cache.get_or_fetch("price", fetch, ttl=0.0)
+        for _ in range(upstream.FAILURE_THRESHOLD):
+            upstream.breaker_for(url).record_failure()
+        return first, await cache.get_or_fetch("price", fetch, ttl=0.0)
+
+    first, during_outage = asyncio.run(scenario())
+    assert during_outage == first == {"host": "focus.test"}
+    assert cache.stale_served == 1
+    assert len(upstream_host.calls) == 1
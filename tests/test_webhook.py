@@ -0,0 +1,39 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from webhook import WEBHOOK_PATH, WebhookApp
+
+
+def post(app, body):
+    # Drives one POST through the ASGI app and returns the response status
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": WEBHOOK_PATH, "headers": []}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"]
+
+
+def make_app():
+    return WebhookApp(SimpleNamespace(update_queue=asyncio.Queue(), bot=None), secret_token=None)
+
+
+@pytest.mark.parametrize("body", [b"not json", b"\xff", b"[]", b"null", b"5", b"{}", b'{"update_id": 1, "message": 5}'])
+def test_malformed_updates_are_rejected(body):
+    app = make_app()
+    assert post(app, body) == 400
+    assert app.application.update_queue.empty()
+
+
+def test_update_is_queued():
+    app = make_app()
+    assert post(app, b'{"update_id": 7}') == 200
+    assert app.application.update_queue.get_nowait().update_id == 7
+    assert app.received == 1
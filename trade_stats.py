@@ -0,0 +1,162 @@
+import numpy as np
+from datetime import datetime, timedelta
+
+STATS_WINDOW = timedelta(days=1)
+TOP_TRADERS = 5
+PRICE_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class TradeStats:
+    __slots__ = ("trades", "volume_usd", "buy_usd", "sell_usd", "vwap", "percentiles", "top_traders")
+
+    def __init__(self, trades, volume_usd, buy_usd, sell_usd, vwap, percentiles, top_traders):
+        self.trades = trades
+        self.volume_usd = volume_usd
+        self.buy_usd = buy_usd
+        self.sell_usd = sell_usd
+        self.vwap = vwap
+        self.percentiles = percentiles  # [(percentile, price)]
+        self.top_traders = top_traders  # [(username, volume_usd, trades)]
+
+    @property
+    def imbalance(self) -> float:
+        # +1 is all buying, -1 all selling
+        return (self.buy_usd - self.sell_usd) / self.volume_usd if self.volume_usd else 0.0
+
+    def message(self) -> str:
+        lines = [
+            f"Last 24 hours Trade Stats ({self.trades} trades):",
+            f"VWAP: ${self.vwap:.4f}",
+            f"Volume: ${self.volume_usd:,.2f}",
+            f"Buys: ${self.buy_usd:,.2f} | Sells: ${self.sell_usd:,.2f} (imbalance {self.imbalance:+.1%})",
+            "Price percentiles: " + " | ".join(f"p{p} ${price:.4f}" for p, price in self.percentiles),
+            "Top traders by volume:",
+        ]
+        for rank, (username, volume_usd, trades) in enumerate(self.top_traders, 1):
+            lines.append(f"{rank}. {username} - ${volume_usd:,.2f} ({trades} trades)")
+        return "\n".join(lines)
+
+
+class TradeColumns:
+    # Stored trades as parallel arrays in insertion order; each load appends only what was stored since
+    def __init__(self):
+        self.timestamps = np.zeros(0, dtype=str)  # ISO strings, compared against the window start
+        self.is_buy = np.zeros(0, dtype=bool)
+        self.valid = np.zeros(0, dtype=bool)
+        self.trader = np.zeros(0, dtype=np.intp)
+        self.value = np.zeros(0)
+        self.price = np.zeros(0)
+        # Tokens traded, value / price; VWAP is total value over total tokens
+        self.tokens = np.zeros(0)
+        self.trader_ids = {}
+        self.usernames = []
+        # The store's insertion sequence of the last loaded row; late trades with older timestamps still
+        # get a higher seq, so they are picked up by the next load
+        self._last_seq = 0
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def load(self, store, since: str = "") -> int:
+        # Rows older than since are skipped, which keeps the first load to one window
+        rows = store.rows_after(self._last_seq, since)
+        if not rows:
+            return 0
+        seqs, timestamps, trade_types, trader_keys, usernames, values, prices = zip(*rows)
+
+        ids = self.trader_ids
+        for key, username in zip(trader_keys, usernames):
+            index = ids.get(key)
+            if index is None:
+                ids[key] = len(self.usernames)
+                self.usernames.append(username or key or "Unknown")
+            elif username and self.usernames[index] == key:
+                self.usernames[index] = username
+        value = np.array(values, dtype=float)
+        price = np.array(prices, dtype=float)
+        # Missing or zero values and prices (NaN compares False) count towards nothing
+        valid = (value > 0) & (price > 0)
+        value[~valid] = 0.0
+        tokens = np.divide(value, price, out=np.zeros_like(value), where=valid)
+
+        self.is_buy = np.concatenate((self.is_buy, np.array(trade_types) == "BUY"))
+        self.valid = np.concatenate((self.valid, valid))
+        self.trader = np.concatenate((self.trader, np.fromiter((ids[k] for k in trader_keys), np.intp, len(rows))))
+        self.value = np.concatenate((self.value, value))
+        self.price = np.concatenate((self.price, price))
+        self.tokens = np.concatenate((self.tokens, tokens))
+
+        self.timestamps = np.concatenate((self.timestamps, np.array(timestamps)))
+        self._last_seq = seqs[-1]
+        return len(rows)
+
+    def drop_before(self, since: str) -> None:
+        # Rows are in insertion order, not time order, so the window is applied as a mask
+        keep = self.timestamps >= since
+        if not keep.all():
+            for name in ("timestamps", "is_buy", "valid", "trader", "value", "price", "tokens"):
+                setattr(self, name, getattr(self, name)[keep])
+            self._reindex_traders()
+
+    def _reindex_traders(self) -> None:
+        # Forget traders with no rows left in the window, so the table follows the window, not uptime
+        remaining, self.trader = np.unique(self.trader, return_inverse=True)
+        self.trader = self.trader.astype(np.intp).reshape(-1)
+        if len(remaining) == len(self.usernames):
+            return
+        keys = [None] * len(self.usernames)
+        for key, index in self.trader_ids.items():
+            keys[index] = key
+        self.trader_ids = {keys[index]: i for i, index in enumerate(remaining)}
+        self.usernames = [self.usernames[index] for index in remaining]
+
+    def stats(self, top: int = TOP_TRADERS):
+        # Every aggregate for the loaded window from the same arrays, no per-trade Python
+        valid = self.valid
+        if not valid.any():
+            return None
+        volume_usd = self.value.sum()
+        buy_usd = self.value[self.is_buy].sum()
+        vwap = volume_usd / self.tokens.sum()
+        percentiles = np.percentile(self.price[valid], PRICE_PERCENTILES)
+
+        trader_volume = np.bincount(self.trader, weights=self.value, minlength=len(self.usernames))
+        trader_trades = np.bincount(self.trader[valid], minlength=len(self.usernames))
+        if len(trader_volume) > top:
+            leaders = np.argpartition(-trader_volume, top)[:top]
+        else:
+            leaders = np.arange(len(trader_volume))
+        leaders = leaders[np.argsort(-trader_volume[leaders])]
+        top_traders = [
+            (self.usernames[i], float(trader_volume[i]), int(trader_trades[i]))
+            for i in leaders if trader_volume[i] > 0
+        ]
+        return TradeStats(
+            int(valid.sum()), float(volume_usd), float(buy_usd), float(volume_usd - buy_usd), float(vwap),
+            list(zip(PRICE_PERCENTILES, percentiles.tolist())), top_traders,
+        )
+
+
+class TradeStatsCache:
+    # Recomputed only when the store has new trades or the window moves on to the next minute
+    def __init__(self, store, window: timedelta = STATS_WINDOW):
+        self.store = store
+        self.window = window
+        self.columns = TradeColumns()
+        self._loaded_version = None
+        self._key = None
+        self._stats = None
+
+    def get(self, now: datetime = None):
+        now = datetime.utcnow() if now is None else now
+        self.store.refresh()
+        since = (now - self.window).replace(second=0, microsecond=0)
+        if self.store.version != self._loaded_version:
+            self.columns.load(self.store, since.isoformat())
+            self._loaded_version = self.store.version
+        key = (self.store.version, since)
+        if key != self._key:
+            self.columns.drop_before(since.isoformat())
+            self._stats = self.columns.stats()
+            self._key = key
+        return self._stats
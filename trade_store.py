@@ -0,0 +1,215 @@
+import logging
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from recent_trades import (
+    TOKEN_PUBLIC_KEY,
+    TRADES_QUERY_DOCUMENT,
+    TRADES_QUERY_HASH,
+    post_graphql,
+)
+
+logger = logging.getLogger(__name__)
+
+TRADE_DB_PATH = os.getenv("TRADE_DB_PATH", "trades.db")
+RETENTION = timedelta(days=2)
+# Every trade is stored so /stats sees the whole window; /bulktrade only lists the large ones
+MIN_TRADE_VALUE_USD = 10000
+INGEST_PAGE_SIZE = 100
+# Pages fetched per ingest run; a longer backlog (e.g. the first 24h crawl) resumes on the next run
+INGEST_MAX_PAGES = 20
+
+# Column order matches the GraphQL node fields kept by the store
+TRADE_FIELDS = (
+    "txnHashHex",
+    "tradeTimestamp",
+    "tradeType",
+    "traderUsername",
+    "tradeValueUsd",
+    "tradeValueDeso",
+    "tradePriceUsd",
+    "traderPublicKey",
+)
+# Columns added after the first release; created on existing databases at startup
+ADDED_COLUMNS = {
+    "trader_public_key": "TEXT",
+    # Insertion order; readers load incrementally on it, since late trades can carry older timestamps
+    "seq": "INTEGER",
+}
+STORED_COLUMNS = (
+    "txn_hash_hex",
+    "trade_timestamp",
+    "trade_type",
+    "trader_username",
+    "trade_value_usd",
+    "trade_value_deso",
+    "trade_price_usd",
+    "trader_public_key",
+)
+
+
+class TradeStore:
+    def __init__(self, path: str = TRADE_DB_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS trades (
+                txn_hash_hex TEXT PRIMARY KEY,
+                trade_timestamp TEXT NOT NULL,
+                trade_type TEXT,
+                trader_username TEXT,
+                trade_value_usd REAL,
+                trade_value_deso REAL,
+                trade_price_usd REAL
+            ) WITHOUT ROWID
+            """
+        )
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(trades)")}
+        for name, column_type in ADDED_COLUMNS.items():
+            if name not in existing:
+                self.conn.execute(f"ALTER TABLE trades ADD COLUMN {name} {column_type}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS trades_by_time ON trades (trade_timestamp)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS trades_by_seq ON trades (seq)")
+        self.conn.commit()
+        self._number_unsequenced()
+        # Bumped on every insert so readers can memoize derived views
+        self.version = 0
+        self._recent = {}
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self) -> None:
+        # Trades ingested by another process sharing the database invalidate the memoized views
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self.version += 1
+            self._recent.clear()
+
+    def _number_unsequenced(self) -> None:
+        # Rows stored before the seq column existed are numbered oldest first, after any sequenced ones
+        self.conn.execute("BEGIN IMMEDIATE")
+        start = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM trades").fetchone()[0]
+        hashes = self.conn.execute(
+            "SELECT txn_hash_hex FROM trades WHERE seq IS NULL ORDER BY trade_timestamp"
+        ).fetchall()
+        self.conn.executemany(
+            "UPDATE trades SET seq = ? WHERE txn_hash_hex = ?",
+            ((start + i, txn_hash) for i, (txn_hash,) in enumerate(hashes, 1)),
+        )
+        self.conn.commit()
+
+    def append(self, trades) -> int:
+        # Insert new trades, ignoring hashes already stored; returns the number added.
+        # The write lock is taken before reading MAX(seq) so processes sharing the database never reuse a seq
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        start = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM trades").fetchone()[0]
+        rows = [(*(trade.get(field) for field in TRADE_FIELDS), start + i) for i, trade in enumerate(trades, 1)]
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO trades ({', '.join(STORED_COLUMNS)}, seq) "
+            f"VALUES ({', '.join('?' * (len(STORED_COLUMNS) + 1))})",
+            rows,
+        )
+        self.conn.commit()
+        added = self.conn.total_changes - before
+        if added:
+            self.version += 1
+            self._recent.clear()
+        return added
+
+    def newest_hash(self) -> str:
+        # Hash of the last stored trade, or "" when empty; unlike version it is the same on every
+        # instance sharing the database, so it can identify a rendering across processes
+        self.refresh()
+        cached = self._recent.get("newest_hash")
+        if cached is None:
+            row = self.conn.execute("SELECT txn_hash_hex FROM trades ORDER BY seq DESC LIMIT 1").fetchone()
+            cached = self._recent["newest_hash"] = row[0] if row else ""
+        return cached
+
+    def latest_timestamp(self):
+        row = self.conn.execute("SELECT MAX(trade_timestamp) FROM trades").fetchone()
+        return row[0]
+
+    def recent(self, since: datetime, min_value_usd: float = MIN_TRADE_VALUE_USD, limit: int = 24):
+        # Newest first, shaped like the GraphQL nodes; memoized per minute until the next insert
+        self.refresh()
+        since_iso = since.replace(second=0, microsecond=0).isoformat()
+        key = (since_iso, min_value_usd, limit)
+        cached = self._recent.get(key)
+        if cached is not None:
+            return cached
+        rows = self.conn.execute(
+            "SELECT * FROM trades WHERE trade_timestamp >= ? AND trade_value_usd >= ? "
+            "ORDER BY trade_timestamp DESC LIMIT ?",
+            (since_iso, min_value_usd, limit),
+        ).fetchall()
+        trades = [dict(zip(TRADE_FIELDS, row)) for row in rows]
+        self._recent[key] = trades
+        return trades
+
+    def rows_after(self, seq: int, timestamp: str = ""):
+        # In insertion order: (seq, tradeTimestamp, tradeType, trader key, traderUsername, tradeValueUsd,
+        # tradePriceUsd) for rows stored after seq and traded at or after timestamp, the trader keyed on
+        # public key where known; feeds the columnar /stats arrays
+        return self.conn.execute(
+            "SELECT seq, trade_timestamp, trade_type, COALESCE(trader_public_key, trader_username, ''), "
+            "trader_username, trade_value_usd, trade_price_usd FROM trades WHERE seq > ? AND trade_timestamp >= ? "
+            "ORDER BY seq",
+            (seq, timestamp),
+        ).fetchall()
+
+    def prune(self, older_than: datetime) -> int:
+        cursor = self.conn.execute("DELETE FROM trades WHERE trade_timestamp < ?", (older_than.isoformat(),))
+        self.conn.commit()
+        if cursor.rowcount:
+            self.version += 1
+            self._recent.clear()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+async def ingest_recent_trades(store: TradeStore, on_trades=None) -> int:
+    # Pull only trades at or after the newest stored one; the primary key drops repeats.
+    # The crawl runs oldest first, so a failed page leaves only newer trades unstored and the
+    # next run resumes from there, as it does after INGEST_MAX_PAGES pages so one run never holds the job
+    # queue for a whole backlog. on_trades, if given, also sees every fetched page (e.g. for whale alerts)
+    now = datetime.utcnow()
+    since = store.latest_timestamp() or (now - timedelta(days=1)).isoformat()
+
+    added = 0
+    after = None
+    for page in range(1, INGEST_MAX_PAGES + 1):
+        variables = {
+            "first": INGEST_PAGE_SIZE,
+            "after": after,
+            "orderBy": ["TRADE_TIMESTAMP_ASC"],
+            "filter": {
+                "isMatchedOrder": {"equalTo": False},
+                "tokenPublicKey": {"equalTo": TOKEN_PUBLIC_KEY},
+                "tradeTimestamp": {"greaterThanOrEqualTo": since}
+            }
+        }
+        data = await post_graphql(TRADES_QUERY_DOCUMENT, TRADES_QUERY_HASH, variables)
+        if not data or not data.get("data"):
+            logger.error("Failed to fetch new trades for ingestion.")
+            break
+
+        connection = data['data']['tradingRecentTrades']
+        added += store.append(connection['nodes'])
+        if on_trades is not None:
+            on_trades(connection['nodes'])
+
+        page_info = connection['pageInfo']
+        if not page_info['hasNextPage'] or not page_info.get('endCursor'):
+            break
+        if page == INGEST_MAX_PAGES:
+            logger.info(f"Ingested {page} pages of trades; the rest of the backlog follows next run.")
+        after = page_info['endCursor']
+
+    store.prune(now - RETENTION)
+    return added
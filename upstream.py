@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import random
+import time
+from urllib.parse import urlsplit
+import httpx
+import metrics
+from http_client import get_async_client
+
+logger = logging.getLogger(__name__)
+
+# Retried with jittered backoff; other methods are retried only when the connection never opened
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.2
+BACKOFF_CAP = 2.0
+# Consecutive failures that open a host's breaker, and how long it stays open before a probe
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+# A hedged request goes to the next URL if the previous one has not answered by then
+HEDGE_DELAY = 0.5
+
+
+class UpstreamError(Exception):
+    pass
+
+
+class CircuitOpenError(UpstreamError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Half-open: let one probe through and hold everyone else for another period
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Circuit opened after {self.failures} consecutive upstream failures")
+            self.opened_at = time.monotonic()
+
+
+_breakers = {}  # host -> CircuitBreaker
+
+
+def breaker_for(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker()
+    return breaker
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    # Full jitter keeps retries from many handlers from arriving in lockstep
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_retryable_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+async def request(method: str, url: str, *, idempotent: bool = None, retries: int = MAX_RETRIES,
+                  **kwargs) -> httpx.Response:
+    # Raises UpstreamError once retries are spent or while the host's breaker is open
+    method = method.upper()
+    idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+    breaker = breaker_for(url)
+    parts = urlsplit(url)
+    endpoint = (parts.netloc, parts.path)
+    error = None
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}")
+        start = time.perf_counter()
+        try:
+            response = await get_async_client().request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            metrics.upstream_latency.observe(time.perf_counter() - start, *endpoint, type(e).__name__)
+            breaker.record_failure()
+            error = e
+            # A request that may have reached the server is only repeated when that is harmless
+            if not idempotent and not isinstance(e, httpx.ConnectError):
+                break
+        else:
+            metrics.upstream_latency.observe(time.perf_counter() - start, *endpoint, str(response.status_code))
+            if not is_retryable_status(response.status_code):
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            error = UpstreamError(f"{response.status_code} from {url}")
+            if not idempotent:
+                break
+        if attempt < retries:
+            await asyncio.sleep(backoff_delay(attempt))
+    raise UpstreamError(f"{method} {url} failed: {error!r}") from error
+
+
+async def hedged_request(method: str, urls, *, hedge_delay: float = HEDGE_DELAY, **kwargs) -> httpx.Response:
+    # Sends to urls[0], then to each next URL if nothing succeeded within hedge_delay; first success wins.
+    # Only for idempotent calls, since more than one copy may be served.
+    pending = set()
+    error = None
+    try:
+        for url in urls:
+            pending.add(asyncio.ensure_future(request(method, url, idempotent=True, **kwargs)))
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from history_get import fetch_closed_candle
+
+logger = logging.getLogger(__name__)
+
+WATCHLIST_DB_PATH = os.getenv("WATCHLIST_DB_PATH", "watchlist.db")
+DEFAULT_THRESHOLD = 5.0
+# Every token on a tick must be fetched and evaluated within this many seconds
+TICK_BUDGET = 20.0
+MAX_CONCURRENT_FETCHES = 32
+
+
+class WatchedToken:
+    def __init__(self, public_key: str, label: str, threshold: float):
+        self.public_key = public_key
+        self.label = label
+        self.threshold = threshold
+
+
+class PriceAlert:
+    def __init__(self, token: WatchedToken, change: float, close: float):
+        self.token = token
+        self.change = change
+        self.close = close
+
+    def message(self) -> str:
+        if self.change > 0:
+            return f"🚀 ${self.token.label} surged by {self.change:.2f}% in the last 15 minutes! New LTP: {self.close} DeSo."
+        return f"📉 ${self.token.label} dropped by {-self.change:.2f}% in the last 15 minutes! New LTP: {self.close} DeSo."
+
+
+class Watchlist:
+    def __init__(self, path: str = WATCHLIST_DB_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS watchlist ("
+            "public_key TEXT PRIMARY KEY, label TEXT NOT NULL, threshold REAL NOT NULL, added_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self._load()
+
+    def _load(self) -> None:
+        self._tokens = {
+            row[0]: WatchedToken(*row)
+            for row in self.conn.execute("SELECT public_key, label, threshold FROM watchlist")
+        }
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def add(self, public_key: str, label: str = None, threshold: float = DEFAULT_THRESHOLD) -> WatchedToken:
+        # Adding an existing token updates its label and threshold
+        token = WatchedToken(public_key, label or public_key[:8], threshold)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watchlist VALUES (?, ?, ?, ?)",
+                (token.public_key, token.label, token.threshold, time.time()),
+            )
+        self._tokens[public_key] = token
+        return token
+
+    def remove(self, public_key: str) -> bool:
+        if public_key not in self._tokens:
+            return False
+        with self.conn:
+            self.conn.execute("DELETE FROM watchlist WHERE public_key = ?", (public_key,))
+        del self._tokens[public_key]
+        return True
+
+    def tokens(self):
+        # Pick up /watch and /unwatch made through other processes sharing the database
+        if self.conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._load()
+        return list(self._tokens.values())
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def percentage_change(candle) -> float:
+    op = candle.get('open')
+    cp = candle.get('close')
+    if not op:
+        return 0.0
+    return ((cp - op) / op) * 100
+
+
+async def evaluate_watchlist(tokens, budget: float = TICK_BUDGET, concurrency: int = MAX_CONCURRENT_FETCHES):
+    # Fetch every token concurrently; tokens not answered within the budget are skipped this tick
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(token):
+        # Judged on the candle that just closed, like the main token's alert
+        async with semaphore:
+            candle = await fetch_closed_candle(token.public_key)
+        if not candle:
+            return None
+        change = percentage_change(candle)
+        if abs(change) >= token.threshold:
+            return PriceAlert(token, change, candle.get('close'))
+        return None
+
+    tasks = [asyncio.ensure_future(check(token)) for token in tokens]
+    if not tasks:
+        return [], []
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+    for task in pending:
+        task.cancel()
+
+    alerts = []
+    for task in done:
+        if task.exception() is not None:
+            logger.error(f"Watchlist fetch failed: {task.exception()}")
+        elif task.result() is not None:
+            alerts.append(task.result())
+    skipped = [token for token, task in zip(tokens, tasks) if task in pending]
+    return alerts, skipped
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import uvicorn
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+# Public HTTPS URL Telegram posts to, e.g. https://bot.example.com (a reverse proxy terminates TLS)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = "/telegram"
+HEALTH_PATH = "/health"
+# Telegram echoes this in X-Telegram-Bot-Api-Secret-Token so forged posts can be rejected
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+# Updates handled at once; the rest wait in the application's update queue
+WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", "64"))
+# Beyond this backlog new updates get a 503 and Telegram redelivers them later
+MAX_PENDING_UPDATES = 1000
+
+
+async def read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def respond(send, status: int, body: bytes = b"", content_type: bytes = b"text/plain") -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class WebhookApp:
+    # Bare ASGI callable: POST updates into the application's queue, GET a health summary
+    def __init__(self, application, path: str = WEBHOOK_PATH, secret_token: str = WEBHOOK_SECRET,
+                 max_pending: int = MAX_PENDING_UPDATES):
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.max_pending = max_pending
+        self.received = 0
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        method, path = scope["method"], scope["path"]
+        if method == "GET" and path == HEALTH_PATH:
+            await self.health(send)
+        elif method == "POST" and path == self.path:
+            await self.receive_update(scope, receive, send)
+        else:
+            await respond(send, 404, b"not found")
+
+    async def health(self, send) -> None:
+        body = {
+            "status": "ok" if self.application.running else "starting",
+            "pending_updates": self.application.update_queue.qsize(),
+            "received": self.received,
+            "rejected": self.rejected,
+        }
+        await respond(send, 200, json.dumps(body).encode(), b"application/json")
+
+    async def receive_update(self, scope, receive, send) -> None:
+        if self.secret_token:
+            headers = dict(scope["headers"])
+            if headers.get(b"x-telegram-bot-api-secret-token", b"").decode() != self.secret_token:
+                await respond(send, 403, b"forbidden")
+                return
+        body = await read_body(receive)
+        queue = self.application.update_queue
+        if queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            await respond(send, 503, b"busy")
+            return
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            # Not JSON, or JSON that is not an update object (e.g. [] or no update_id)
+            await respond(send, 400, b"bad update")
+            return
+        # Answer right away; handlers run on the application's bounded concurrency
+        await queue.put(update)
+        self.received += 1
+        await respond(send, 200)
+
+
+async def run_webhook(application, webhook_url: str = WEBHOOK_URL, listen: str = WEBHOOK_LISTEN,
+                      port: int = WEBHOOK_PORT, secret_token: str = WEBHOOK_SECRET) -> None:
+    # Replaces run_polling: same lifecycle hooks, updates arrive over HTTP instead of getUpdates
+    app = WebhookApp(application, secret_token=secret_token)
+    server = uvicorn.Server(uvicorn.Config(app, host=listen, port=port, log_level="warning", lifespan="on"))
+    async with application:
+        if application.post_init:
+            await application.post_init(application)
+        if webhook_url:
+            await application.bot.set_webhook(
+                url=f"{webhook_url.rstrip('/')}{WEBHOOK_PATH}",
+                allowed_updates=Update.ALL_TYPES,
+                secret_token=secret_token,
+                max_connections=min(100, WEBHOOK_CONCURRENCY),
+            )
+        await application.start()
+        logger.info(f"Serving webhook on http://{listen}:{port}{WEBHOOK_PATH}")
+        try:
+            await server.serve()
+        finally:
+            await application.stop()
+            if application.post_shutdown:
+                await application.post_shutdown(application)
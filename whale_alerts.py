@@ -0,0 +1,79 @@
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+# Trades at or above this value are pushed to whale-alert subscribers
+WHALE_MIN_USD = float(os.getenv("WHALE_MIN_USD", "10000"))
+# Trades older than this when first seen are history, not news (e.g. the startup backfill)
+MAX_TRADE_AGE = timedelta(minutes=10)
+# Bounded memory of hashes already seen; far more than one polling interval can return
+SEEN_CAPACITY = 4096
+
+
+class WhaleAlert:
+    __slots__ = ("trader", "trade_type", "count", "value_usd", "value_deso", "last_price_usd")
+
+    def __init__(self, trader: str, trade_type: str):
+        self.trader = trader
+        self.trade_type = trade_type
+        self.count = 0
+        self.value_usd = 0.0
+        self.value_deso = 0.0
+        self.last_price_usd = 0.0
+
+    def add(self, trade) -> None:
+        self.count += 1
+        self.value_usd += trade.get('tradeValueUsd') or 0
+        self.value_deso += trade.get('tradeValueDeso') or 0
+        self.last_price_usd = trade.get('tradePriceUsd') or self.last_price_usd
+
+    def message(self) -> str:
+        emoji = "🐋🟢" if self.trade_type == "BUY" else "🐋🔴"
+        trades = "trade" if self.count == 1 else f"{self.count} trades"
+        return (
+            f"{emoji} Whale {self.trade_type}: {self.trader} moved ${self.value_usd:,.2f} "
+            f"({self.value_deso:,.2f} DeSo) in {trades} at ${self.last_price_usd:,.2f}."
+        )
+
+
+class WhaleWatcher:
+    # Fed with every page the trade ingestion job fetches, so whales cost no extra upstream query
+    def __init__(self, min_value_usd: float = WHALE_MIN_USD, max_age: timedelta = MAX_TRADE_AGE,
+                 capacity: int = SEEN_CAPACITY, claim=None):
+        self.min_value_usd = min_value_usd
+        self.max_age = max_age
+        self.capacity = capacity
+        # claim(txn_hash) -> bool, False when another instance already alerted on the trade
+        self.claim = claim
+        self._seen = OrderedDict()  # txnHashHex -> None, oldest first
+        self._pending = OrderedDict()  # (trader, trade type) -> WhaleAlert
+
+    def observe(self, trades, now: datetime = None) -> int:
+        # Queues new large trades by trader and side; returns how many were new
+        now = datetime.utcnow() if now is None else now
+        cutoff = (now - self.max_age).isoformat()
+        added = 0
+        for trade in trades:
+            txn_hash = trade.get('txnHashHex')
+            if not txn_hash or txn_hash in self._seen:
+                continue
+            self._seen[txn_hash] = None
+            if len(self._seen) > self.capacity:
+                self._seen.popitem(last=False)
+            if (trade.get('tradeValueUsd') or 0) < self.min_value_usd or (trade.get('tradeTimestamp') or '') < cutoff:
+                continue
+            if self.claim is not None and not self.claim(txn_hash):
+                continue
+            key = (trade.get('traderUsername') or 'Unknown', trade.get('tradeType', 'N/A'))
+            alert = self._pending.get(key)
+            if alert is None:
+                alert = self._pending[key] = WhaleAlert(*key)
+            alert.add(trade)
+            added += 1
+        return added
+
+    def drain(self):
+        # One alert per trader and side for everything seen since the last drain
+        alerts = list(self._pending.values())
+        self._pending.clear()
+        return alerts